@@ -0,0 +1,97 @@
+import hashlib
+import json
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+STATISTICS_GENERATION_KEY = 'admin_panel:stats:generation'
+STATISTICS_METRICS_KEY = 'admin_panel:stats:metrics:{name}:{metric}'
+STATISTICS_METRICS = ['hits', 'stale_hits', 'misses', 'recomputes', 'recompute_ms']
+STATISTICS_NAMES_KEY = 'admin_panel:stats:names'
+
+
+def _incr(key, delta=1):
+    try:
+        return cache.incr(key, delta)
+    except ValueError:
+        cache.add(key, 0, None)
+        return cache.incr(key, delta)
+
+
+def get_statistics_generation():
+    generation = cache.get(STATISTICS_GENERATION_KEY)
+    if generation is None:
+        cache.add(STATISTICS_GENERATION_KEY, int(time.time() * 1000), None)
+        generation = cache.get(STATISTICS_GENERATION_KEY)
+    return generation
+
+
+# Invalidation hook for order writes: every cached statistic becomes stale at once.
+def invalidate_order_statistics():
+    try:
+        cache.incr(STATISTICS_GENERATION_KEY)
+    except ValueError:
+        get_statistics_generation()
+
+
+def _record(name, metric, delta=1):
+    names = cache.get(STATISTICS_NAMES_KEY) or []
+    if name not in names:
+        cache.set(STATISTICS_NAMES_KEY, names + [name], None)
+    _incr(STATISTICS_METRICS_KEY.format(name=name, metric=metric), delta)
+
+
+def _recompute(name, key, compute, generation):
+    started = time.monotonic()
+    value = compute()
+    elapsed_ms = int((time.monotonic() - started) * 1000)
+    ttl = settings.ADMIN_STATS_CACHE_TTLS.get(name, settings.ADMIN_STATS_DEFAULT_TTL)
+    entry = {'value': value, 'generation': generation, 'expires_at': time.time() + ttl}
+    # Expired entries are kept around past their TTL so they can be served while one worker recomputes.
+    cache.set(key, entry, ttl + settings.ADMIN_STATS_STALE_TTL)
+    _record(name, 'recomputes')
+    _record(name, 'recompute_ms', elapsed_ms)
+    return value
+
+
+def cached_statistics(name, key_parts, compute):
+    digest = hashlib.sha256(json.dumps(key_parts, sort_keys=True, default=str).encode()).hexdigest()
+    key = f'admin_panel:stats:{name}:{digest}'
+    generation = get_statistics_generation()
+    entry = cache.get(key)
+    if entry is not None and entry['generation'] == generation and entry['expires_at'] > time.time():
+        _record(name, 'hits')
+        return entry['value']
+
+    lock_key = f'{key}:lock'
+    if cache.add(lock_key, 1, settings.ADMIN_STATS_LOCK_TIMEOUT):
+        try:
+            _record(name, 'misses')
+            return _recompute(name, key, compute, generation)
+        finally:
+            cache.delete(lock_key)
+
+    if entry is not None:
+        _record(name, 'stale_hits')
+        return entry['value']
+
+    # Nothing to fall back on yet: compute without storing and leave the write to the lock holder.
+    _record(name, 'misses')
+    return compute()
+
+
+def get_statistics_cache_metrics():
+    metrics = {}
+    for name in cache.get(STATISTICS_NAMES_KEY) or []:
+        values = {
+            metric: cache.get(STATISTICS_METRICS_KEY.format(name=name, metric=metric), 0)
+            for metric in STATISTICS_METRICS
+        }
+        served = values['hits'] + values['stale_hits']
+        total = served + values['misses']
+        recompute_ms = values.pop('recompute_ms')
+        values['hit_ratio'] = round(served / total, 4) if total else None
+        values['avg_recompute_ms'] = round(recompute_ms / values['recomputes'], 2) if values['recomputes'] else None
+        metrics[name] = values
+    return {'generation': get_statistics_generation(), 'keys': metrics}
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from admin_panel.rollups import refresh_order_rollups_service
+
+
+class Command(BaseCommand):
+    help = 'Refresh the daily order rollups for days with orders changed since the last run'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--full', action='store_true', help='Rebuild every day from the whole orders table')
+
+    def handle(self, *args, **options):
+        result = refresh_order_rollups_service(full=options['full'])
+        if result['days'] is None:
+            self.stdout.write(self.style.SUCCESS(f"Rebuilt all rollups: {result['rows']} row(s)"))
+        else:
+            self.stdout.write(self.style.SUCCESS(
+                f"Refreshed {len(result['days'])} day(s): {result['rows']} row(s)"
+            ))
@@ -0,0 +1,47 @@
+# Generated by Django 5.1 on 2026-10-18 02:47
+
+import django.db.models.deletion
+import orders.fields
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OrderRollupState',
+            fields=[
+                ('name', models.CharField(max_length=50, primary_key=True, serialize=False)),
+                ('watermark', models.DateTimeField(blank=True, null=True)),
+                ('refreshed_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'db_table': 'order_rollup_state',
+            },
+        ),
+        migrations.CreateModel(
+            name='OrderDailyRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('status', orders.fields.CodedChoiceField(blank=True, labels=['In work', 'New', 'Agree', 'Disagree', 'Dubbing'], null=True)),
+                ('course', orders.fields.CodedChoiceField(blank=True, labels=['FS', 'QACX', 'JCX', 'JSCX', 'FE', 'PCX'], null=True)),
+                ('course_format', orders.fields.CodedChoiceField(blank=True, labels=['static', 'online'], null=True)),
+                ('orders_count', models.PositiveIntegerField(default=0)),
+                ('sum_total', models.BigIntegerField(default=0)),
+                ('already_paid_total', models.BigIntegerField(default=0)),
+                ('manager', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'db_table': 'order_daily_rollups',
+                'indexes': [models.Index(fields=['day'], name='order_rollups_day_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,51 @@
+from django.contrib.auth.models import User
+from django.db import models
+
+from orders.fields import CodedChoiceField
+from orders.models import COURSE_CHOICES, COURSE_FORMAT_CHOICES, STATUS_CHOICES
+
+
+# Orders created on `day`, aggregated per status/course/course format/manager combination.
+class OrderDailyRollup(models.Model):
+    day = models.DateField()
+    status = CodedChoiceField(labels=STATUS_CHOICES, null=True, blank=True)
+    course = CodedChoiceField(labels=COURSE_CHOICES, null=True, blank=True)
+    course_format = CodedChoiceField(labels=COURSE_FORMAT_CHOICES, null=True, blank=True)
+    manager = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True)
+    orders_count = models.PositiveIntegerField(default=0)
+    sum_total = models.BigIntegerField(default=0)
+    already_paid_total = models.BigIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.day} {self.status} {self.orders_count}"
+
+    class Meta:
+        db_table = 'order_daily_rollups'
+        indexes = [
+            models.Index(fields=['day'], name='order_rollups_day_idx'),
+        ]
+
+
+class OrderRollupState(models.Model):
+    name = models.CharField(max_length=50, primary_key=True)
+    watermark = models.DateTimeField(null=True, blank=True)
+    refreshed_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"{self.name} {self.watermark}"
+
+    class Meta:
+        db_table = 'order_rollup_state'
+
+
+# Days whose rollups lost an order to a delete; updated_at cannot point the
+# incremental refresh at them because the row is gone.
+class OrderRollupDirtyDay(models.Model):
+    day = models.DateField(primary_key=True)
+    marked_at = models.DateTimeField()
+
+    def __str__(self):
+        return f"{self.day} {self.marked_at}"
+
+    class Meta:
+        db_table = 'order_rollup_dirty_days'
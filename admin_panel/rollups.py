@@ -0,0 +1,136 @@
+import datetime
+from itertools import islice
+
+import pandas as pd
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Sum, Value
+from django.db.models.functions import Coalesce, TruncDate
+from django.utils import timezone
+
+from orders.keyset import iter_keyset
+from orders.models import OrderModel
+from .models import OrderDailyRollup, OrderRollupDirtyDay, OrderRollupState
+
+ORDERS_ROLLUP = 'orders_daily'
+ROLLUP_KEYS = ['day', 'status', 'course', 'course_format', 'manager_id']
+BACKFILL_CHUNK_SIZE = 50000
+
+
+def _day_bounds(first_day, last_day):
+    tz = timezone.get_current_timezone()
+    start = timezone.make_aware(datetime.datetime.combine(first_day, datetime.time.min), tz)
+    end = timezone.make_aware(datetime.datetime.combine(last_day + datetime.timedelta(days=1), datetime.time.min), tz)
+    return start, end
+
+
+def _day_runs(days):
+    # Groups sorted days into contiguous (first, last) ranges so each range is one indexed scan.
+    runs = []
+    for day in sorted(days):
+        if runs and day - runs[-1][1] == datetime.timedelta(days=1):
+            runs[-1][1] = day
+        else:
+            runs.append([day, day])
+    return runs
+
+
+def _aggregate_days(first_day, last_day):
+    start, end = _day_bounds(first_day, last_day)
+    rows = (
+        OrderModel.objects
+        .filter(created_at__gte=start, created_at__lt=end)
+        .annotate(day=TruncDate('created_at'))
+        .order_by()
+        .values(*ROLLUP_KEYS)
+        .annotate(
+            orders_count=Count('id'),
+            sum_total=Coalesce(Sum('sum'), Value(0)),
+            already_paid_total=Coalesce(Sum('alreadyPaid'), Value(0)),
+        )
+    )
+    return [OrderDailyRollup(**row) for row in rows]
+
+
+def refresh_order_rollups(days):
+    with transaction.atomic():
+        OrderDailyRollup.objects.filter(day__in=days).delete()
+        rollups = []
+        for first_day, last_day in _day_runs(days):
+            rollups += _aggregate_days(first_day, last_day)
+        OrderDailyRollup.objects.bulk_create(rollups, batch_size=1000)
+    return len(rollups)
+
+
+def _aggregate_frame(frame):
+    tz = timezone.get_current_timezone()
+    frame['day'] = pd.to_datetime(frame['created_at'], utc=True).dt.tz_convert(tz).dt.date
+    frame[['sum', 'alreadyPaid']] = frame[['sum', 'alreadyPaid']].fillna(0)
+    return (
+        frame
+        .groupby(ROLLUP_KEYS, dropna=False, sort=False)
+        .agg(orders_count=('day', 'size'), sum_total=('sum', 'sum'), already_paid_total=('alreadyPaid', 'sum'))
+        .reset_index()
+    )
+
+
+def _frame_to_rollups(frame):
+    frame = frame.astype(object).where(frame.notna(), None)
+    return [
+        OrderDailyRollup(
+            day=row['day'],
+            status=row['status'],
+            course=row['course'],
+            course_format=row['course_format'],
+            manager_id=int(row['manager_id']) if row['manager_id'] is not None else None,
+            orders_count=int(row['orders_count']),
+            sum_total=int(row['sum_total']),
+            already_paid_total=int(row['already_paid_total']),
+        )
+        for row in frame.to_dict('records')
+    ]
+
+
+def backfill_order_rollups(chunk_size=BACKFILL_CHUNK_SIZE):
+    columns = ['created_at', 'status', 'course', 'course_format', 'manager_id', 'sum', 'alreadyPaid']
+    rows = iter_keyset(OrderModel.objects.order_by('id'), columns, chunk_size)
+
+    # Each chunk is reduced to its group totals, which are summed again after the last chunk.
+    partials = []
+    while chunk := list(islice(rows, chunk_size)):
+        partials.append(_aggregate_frame(pd.DataFrame.from_records(chunk, columns=columns)))
+
+    rollups = []
+    if partials:
+        totals = pd.concat(partials).groupby(ROLLUP_KEYS, dropna=False, sort=False).sum().reset_index()
+        rollups = _frame_to_rollups(totals)
+
+    with transaction.atomic():
+        OrderDailyRollup.objects.all().delete()
+        OrderDailyRollup.objects.bulk_create(rollups, batch_size=1000)
+    return len(rollups)
+
+
+def refresh_order_rollups_service(full=False):
+    started = timezone.now()
+    state, _ = OrderRollupState.objects.get_or_create(name=ORDERS_ROLLUP)
+
+    if full or state.watermark is None:
+        days = None
+        rows = backfill_order_rollups()
+    else:
+        # The overlap picks up orders whose transactions committed after the previous run started.
+        since = state.watermark - settings.ORDER_ROLLUP_OVERLAP
+        days = set(OrderModel.objects.filter(updated_at__gt=since).order_by().dates('created_at', 'day'))
+        days.update(OrderRollupDirtyDay.objects.values_list('day', flat=True))
+        days = sorted(days)
+        rows = refresh_order_rollups(days) if days else 0
+
+    # Marks stay for one overlap window, like the watermark, so a delete committed
+    # during this run is refreshed again by the next one.
+    OrderRollupDirtyDay.objects.filter(marked_at__lt=started - settings.ORDER_ROLLUP_OVERLAP).delete()
+
+    state.watermark = started
+    state.refreshed_at = timezone.now()
+    state.save()
+    return {'days': days, 'rows': rows}
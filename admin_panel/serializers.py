@@ -0,0 +1,17 @@
+from rest_framework import serializers
+
+
+class OrderTimeseriesQuerySerializer(serializers.Serializer):
+    bucket = serializers.ChoiceField(choices=['day', 'week', 'month'], default='day')
+    group_by = serializers.ChoiceField(choices=['status', 'course', 'course_format', 'manager'], required=False)
+    date_from = serializers.DateField(required=False)
+    date_to = serializers.DateField(required=False)
+
+    def validate(self, attrs):
+        if attrs.get('date_from') and attrs.get('date_to') and attrs['date_from'] > attrs['date_to']:
+            raise serializers.ValidationError({'date_to': 'Date to must not be before date from'})
+        return attrs
+
+
+class PaymentsSummaryQuerySerializer(serializers.Serializer):
+    group_by = serializers.ChoiceField(choices=['course', 'group', 'manager'], required=False)
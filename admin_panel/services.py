@@ -1,29 +1,39 @@
 from datetime import timedelta
+
+import numpy as np
 from django.contrib.auth.models import User
-from django.db.models import Count
+from django.db.models import Case, Count, F, Q, Sum, Value, When
+from django.db.models.functions import Coalesce, TruncMonth, TruncWeek
 from rest_framework import serializers, status
 from rest_framework.response import Response
 from rest_framework_simplejwt.tokens import Token, TokenError
 
-from orders.models import OrderModel
-
+from authorization.authentication import invalidate_cached_user
+from orders.cache import get_response_cache_metrics, normalize_query_params
+from orders.filters import OrderFilter
+from orders.models import OrderModel, OrderStatusCounter, STATUS_CHOICES
+from .cache import cached_statistics, get_statistics_cache_metrics
+from .models import OrderDailyRollup, OrderRollupState
+from .pagination import ManagerStatisticsPagination
+from .rollups import ORDERS_ROLLUP
+from .serializers import OrderTimeseriesQuerySerializer, PaymentsSummaryQuerySerializer
 
-def get_order_statistics_service():
-    total_count = OrderModel.objects.count()
-    statuses = OrderModel.objects.values('status').annotate(count=Count('status'))
-    null_count = OrderModel.objects.filter(status__isnull=True).count()
+# Sort keys of the per-manager status counts, e.g. 'in_work' -> 'In work'.
+MANAGER_STATUS_KEYS = {status.lower().replace(' ', '_'): status for status in STATUS_CHOICES}
+MANAGER_STATUS_KEYS['null'] = None
+MANAGER_ORDERING_FIELDS = ['total_count'] + list(MANAGER_STATUS_KEYS)
 
-    status_counts = {status['status']: status['count'] for status in statuses}
-    status_counts[None] = null_count
 
-    for status in ['In work', 'New', 'Agree', 'Disagree', 'Dubbing', None]:
-        if status not in status_counts:
-            status_counts[status] = 0
+def get_order_statistics_service():
+    counters = OrderStatusCounter.objects.values_list('status_code', 'count')
+    status_counts = {status: 0 for status in ['In work', 'New', 'Agree', 'Disagree', 'Dubbing', None]}
+    for status_code, count in counters:
+        status_counts[OrderStatusCounter.label_for(status_code)] = count
 
     sorted_statuses = sorted(status_counts.items(), key=lambda x: (x[0] is not None, str(x[0])))
 
     result = {
-        'total_count': total_count,
+        'total_count': sum(status_counts.values()),
         'statuses': [{'status': status if status is not None else 'null', 'count': count} for status, count in sorted_statuses]
     }
 
@@ -43,11 +53,240 @@ def get_user_order_statistics_service(user_id):
     return result
 
 
+def get_managers_statistics_queryset(ids=None, ordering='-total_count'):
+    annotations = {'total_count': Count('ordermodel')}
+    for key, status in MANAGER_STATUS_KEYS.items():
+        condition = Q(ordermodel__status__isnull=True) if status is None else Q(ordermodel__status=status)
+        annotations[key] = Count('ordermodel', filter=condition)
+
+    users = User.objects.filter(userprofile__isnull=False)
+    if ids is not None:
+        users = users.filter(id__in=ids)
+
+    field = ordering.lstrip('-')
+    order_by = F(field).desc() if ordering.startswith('-') else F(field).asc()
+    return (
+        users
+        .values('id', 'first_name', 'last_name', 'email', role=F('userprofile__role'))
+        .annotate(**annotations)
+        .order_by(order_by, 'id')
+    )
+
+
+def _parse_manager_statistics_params(params):
+    ids = params.get('ids')
+    if ids:
+        try:
+            ids = [int(user_id) for user_id in ids.split(',') if user_id.strip()]
+        except ValueError:
+            raise serializers.ValidationError({'ids': 'Ids must be a comma-separated list of integers'})
+
+    ordering = params.get('ordering') or '-total_count'
+    if ordering.lstrip('-') not in MANAGER_ORDERING_FIELDS:
+        raise serializers.ValidationError({'ordering': f'Ordering must be one of {MANAGER_ORDERING_FIELDS}'})
+    return ids or None, ordering
+
+
+def _format_manager_statistics(row):
+    statuses = sorted(
+        ((MANAGER_STATUS_KEYS[key], row[key]) for key in MANAGER_STATUS_KEYS),
+        key=lambda x: (x[0] is not None, str(x[0])),
+    )
+    return {
+        'id': row['id'],
+        'first_name': row['first_name'],
+        'last_name': row['last_name'],
+        'email': row['email'],
+        'role': row['role'],
+        'total_count': row['total_count'],
+        'statuses': [{'status': status if status is not None else 'null', 'count': count} for status, count in statuses],
+    }
+
+
+def handle_managers_statistics(request, view=None):
+    def compute():
+        ids, ordering = _parse_manager_statistics_params(request.query_params)
+        paginator = ManagerStatisticsPagination()
+        page = paginator.paginate_queryset(get_managers_statistics_queryset(ids, ordering), request, view)
+        return paginator.get_paginated_response([_format_manager_statistics(row) for row in page]).data
+
+    # The host is part of the key because the pagination links are absolute.
+    params_hash, _ = normalize_query_params(request.query_params)
+    data = cached_statistics('managers_statistics', [request.get_host(), params_hash], compute)
+    return Response(data, status=status.HTTP_200_OK)
+
+
+def get_order_timeseries_service(bucket='day', group_by=None, date_from=None, date_to=None):
+    periods = {'day': F('day'), 'week': TruncWeek('day'), 'month': TruncMonth('day')}
+    group_fields = []
+    if group_by == 'manager':
+        group_fields = ['manager', 'manager__first_name', 'manager__last_name']
+    elif group_by:
+        group_fields = [group_by]
+
+    rollups = OrderDailyRollup.objects.all()
+    if date_from:
+        rollups = rollups.filter(day__gte=date_from)
+    if date_to:
+        rollups = rollups.filter(day__lte=date_to)
+    rows = (
+        rollups
+        .annotate(period=periods[bucket])
+        .values('period', *group_fields)
+        .annotate(count=Sum('orders_count'), sum=Sum('sum_total'), already_paid=Sum('already_paid_total'))
+        .order_by('period', *group_fields)
+    )
+
+    results = []
+    for row in rows:
+        if not results or results[-1]['period'] != row['period']:
+            results.append({'period': row['period'], 'count': 0, 'sum': 0, 'already_paid': 0})
+            if group_by:
+                results[-1]['groups'] = []
+        period = results[-1]
+        for total in ['count', 'sum', 'already_paid']:
+            period[total] += row[total]
+        if group_by == 'manager':
+            name = f"{row['manager__first_name']} {row['manager__last_name']}" if row['manager'] else None
+            period['groups'].append({'manager': row['manager'], 'name': name, 'count': row['count'],
+                                     'sum': row['sum'], 'already_paid': row['already_paid']})
+        elif group_by:
+            key = row[group_by] if row[group_by] is not None else 'null'
+            period['groups'].append({group_by: key, 'count': row['count'],
+                                     'sum': row['sum'], 'already_paid': row['already_paid']})
+
+    state = OrderRollupState.objects.filter(name=ORDERS_ROLLUP).first()
+    return {
+        'bucket': bucket,
+        'group_by': group_by,
+        'refreshed_at': state.refreshed_at if state else None,
+        'results': results,
+    }
+
+
+def handle_order_timeseries(request):
+    serializer = OrderTimeseriesQuerySerializer(data=request.query_params)
+    serializer.is_valid(raise_exception=True)
+    return Response(get_order_timeseries_service(**serializer.validated_data), status=status.HTTP_200_OK)
+
+
+PAYMENT_PERCENTILES = [25, 50, 75, 90]
+
+
+def _payment_aggregates():
+    paid = Coalesce(F('alreadyPaid'), Value(0))
+    return {
+        'orders': Count('id'),
+        'total_sum': Coalesce(Sum('sum'), Value(0)),
+        'total_paid': Coalesce(Sum('alreadyPaid'), Value(0)),
+        'outstanding': Coalesce(Sum(Case(When(sum__gt=paid, then=F('sum') - paid), default=Value(0))), Value(0)),
+        'paid_count': Count('id', filter=Q(sum__gt=0, alreadyPaid__gte=F('sum'))),
+        'partially_paid_count': Count('id', filter=Q(alreadyPaid__gt=0, sum__gt=F('alreadyPaid'))),
+        'unpaid_count': Count('id', filter=Q(sum__gt=0) & (Q(alreadyPaid__isnull=True) | Q(alreadyPaid=0))),
+    }
+
+
+def _percentiles(values):
+    values = values[~np.isnan(values)]
+    if not values.size:
+        return {f'p{q}': None for q in PAYMENT_PERCENTILES}
+    return {f'p{q}': round(float(v), 2) for q, v in zip(PAYMENT_PERCENTILES, np.percentile(values, PAYMENT_PERCENTILES))}
+
+
+def _payment_group_key(value):
+    return None if value is None else str(value)
+
+
+def _payment_percentiles(queryset, key_field=None):
+    # One columnar pass: the sum/alreadyPaid columns go straight into float arrays (NULL -> NaN).
+    fields = ['sum', 'alreadyPaid'] + ([key_field] if key_field else [])
+    columns = list(zip(*queryset.order_by().values_list(*fields))) or [(), (), ()]
+    sums = np.array(columns[0], dtype=float)
+    paid = np.array(columns[1], dtype=float)
+    overall = {'sum': _percentiles(sums), 'already_paid': _percentiles(paid)}
+    if not key_field:
+        return overall, {}
+
+    # NULL and '' stay separate groups, matching the GROUP BY of the aggregate rows.
+    positions = {}
+    codes = np.array([positions.setdefault(_payment_group_key(key), len(positions)) for key in columns[2]], dtype=int)
+    groups = {}
+    for key, position in positions.items():
+        mask = codes == position
+        groups[key] = {'sum': _percentiles(sums[mask]), 'already_paid': _percentiles(paid[mask])}
+    return overall, groups
+
+
+def _format_payment_row(row, percentiles):
+    total_sum = row['total_sum']
+    row['paid_ratio'] = round(row['total_paid'] / total_sum, 4) if total_sum else None
+    row['percentiles'] = percentiles
+    return row
+
+
+def get_payments_summary_service(queryset, group_by=None):
+    aggregates = _payment_aggregates()
+    overall, group_percentiles = _payment_percentiles(queryset, group_by)
+    result = {
+        'group_by': group_by,
+        'summary': _format_payment_row(queryset.order_by().aggregate(**aggregates), overall),
+    }
+    if not group_by:
+        return result
+
+    group_fields = ['manager', 'manager__first_name', 'manager__last_name'] if group_by == 'manager' else [group_by]
+    rows = queryset.order_by().values(*group_fields).annotate(**aggregates).order_by(*group_fields)
+
+    groups = []
+    for row in rows:
+        key = row[group_by]
+        if group_by == 'manager':
+            first_name, last_name = row.pop('manager__first_name'), row.pop('manager__last_name')
+            row['name'] = f'{first_name} {last_name}' if key else None
+        elif key is None:
+            row[group_by] = 'null'
+        groups.append(_format_payment_row(row, group_percentiles[_payment_group_key(key)]))
+    result['groups'] = groups
+    return result
+
+
+def handle_payments_summary(request):
+    serializer = PaymentsSummaryQuerySerializer(data=request.query_params)
+    serializer.is_valid(raise_exception=True)
+    filterset = OrderFilter(request.query_params, queryset=OrderModel.objects.all(), request=request)
+    if not filterset.is_valid():
+        raise serializers.ValidationError(filterset.errors)
+    params_hash, _ = normalize_query_params(request.query_params)
+    result = cached_statistics(
+        'payments_summary', [params_hash],
+        lambda: get_payments_summary_service(filterset.qs, serializer.validated_data.get('group_by')),
+    )
+    return Response(result, status=status.HTTP_200_OK)
+
+
+def handle_order_statistics():
+    result = cached_statistics('order_statistics', [], get_order_statistics_service)
+    return Response(result, status=status.HTTP_200_OK)
+
+
+def handle_user_order_statistics(user_id):
+    result = cached_statistics('user_order_statistics', [user_id], lambda: get_user_order_statistics_service(user_id))
+    return Response(result, status=status.HTTP_200_OK)
+
+
+def get_cache_statistics_service():
+    return {
+        'orders_response': get_response_cache_metrics(),
+        'admin_statistics': get_statistics_cache_metrics(),
+    }
+
+
 def ban_user_service(user_id):
     try:
         user = User.objects.get(pk=user_id)
         user.is_active = False
         user.save()
+        invalidate_cached_user(user.pk)
         return Response({'detail': f'User {user.first_name} {user.last_name} has been banned'}, status=status.HTTP_200_OK)
     except User.DoesNotExist:
         return Response({'detail': 'User not found'}, status=status.HTTP_404_NOT_FOUND)
@@ -58,6 +297,7 @@ def unban_user_service(user_id):
         user = User.objects.get(pk=user_id)
         user.is_active = True
         user.save()
+        invalidate_cached_user(user.pk)
         return Response({'detail': f'User {user.first_name} {user.last_name} has been unbanned'}, status=status.HTTP_200_OK)
     except User.DoesNotExist:
         return Response({'detail': 'User not found'}, status=status.HTTP_404_NOT_FOUND)
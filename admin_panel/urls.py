@@ -1,7 +1,8 @@
 from django.urls import path
 
 from admin_panel.views import BanUserView, UnbanUserView, OrderStatisticsView, UserOrderStatisticsView, \
-    UserActivationTokenView
+    UserActivationTokenView, CacheStatisticsView, ManagersOrderStatisticsView, \
+    OrderTimeseriesView, PaymentsSummaryView
 from users.views import CreateUserView, UserListView
 
 urlpatterns = [
@@ -10,6 +11,10 @@ urlpatterns = [
     path('users/<int:id>/ban/', BanUserView.as_view(), name='ban_user'),
     path('users/<int:id>/unban/', UnbanUserView.as_view(), name='unban_user'),
     path('statistic/orders/', OrderStatisticsView.as_view(), name='admin_order_statistics'),
+    path('statistic/orders/timeseries/', OrderTimeseriesView.as_view(), name='admin_order_timeseries'),
+    path('statistic/payments/', PaymentsSummaryView.as_view(), name='admin_payments_summary'),
+    path('statistic/users/', ManagersOrderStatisticsView.as_view(), name='admin_managers_order_statistics'),
     path('statistic/users/<int:id>/', UserOrderStatisticsView.as_view(), name='admin_user_order_statistics'),
+    path('statistic/cache/', CacheStatisticsView.as_view(), name='admin_cache_statistics'),
     path('users/<int:id>/re_token/', UserActivationTokenView.as_view(), name='admin_users_re_token'),
     ]
\ No newline at end of file
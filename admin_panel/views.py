@@ -3,8 +3,10 @@ from rest_framework.response import Response
 from rest_framework.views import APIView
 
 from authorization.serializers import ActivateUserSerializer
-from .services import get_order_statistics_service, get_user_order_statistics_service, ban_user_service, \
-    unban_user_service, handle_generate_token_or_error, activate_user_service
+from .services import handle_order_statistics, handle_user_order_statistics, ban_user_service, \
+    unban_user_service, handle_generate_token_or_error, activate_user_service, get_cache_statistics_service, \
+    handle_managers_statistics, handle_order_timeseries, \
+    handle_payments_summary
 from orders.permissions import IsAdminUserRole
 
 
@@ -13,8 +15,7 @@ class OrderStatisticsView(APIView):
 
     @staticmethod
     def get(request):
-        result = get_order_statistics_service()
-        return Response(result, status=status.HTTP_200_OK)
+        return handle_order_statistics()
 
 
 class UserOrderStatisticsView(APIView):
@@ -22,9 +23,41 @@ class UserOrderStatisticsView(APIView):
 
     @staticmethod
     def get(request, id):
-        result = get_user_order_statistics_service(id)
+        return handle_user_order_statistics(id)
+
+
+class ManagersOrderStatisticsView(APIView):
+    permission_classes = [IsAdminUserRole]
+
+    def get(self, request):
+        return handle_managers_statistics(request, self)
+
+
+class OrderTimeseriesView(APIView):
+    permission_classes = [IsAdminUserRole]
+
+    @staticmethod
+    def get(request):
+        return handle_order_timeseries(request)
+
+
+class PaymentsSummaryView(APIView):
+    permission_classes = [IsAdminUserRole]
+
+    @staticmethod
+    def get(request):
+        return handle_payments_summary(request)
+
+
+class CacheStatisticsView(APIView):
+    permission_classes = [IsAdminUserRole]
+
+    @staticmethod
+    def get(request):
+        result = get_cache_statistics_service()
         return Response(result, status=status.HTTP_200_OK)
 
+
 class BanUserView(APIView):
     permission_classes = [IsAdminUserRole]
 
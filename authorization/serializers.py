@@ -2,9 +2,11 @@ import re
 
 from django.contrib.auth.models import User
 from rest_framework import serializers
-from rest_framework_simplejwt.tokens import RefreshToken
+from rest_framework_simplejwt.serializers import TokenRefreshSerializer
 from django.utils.translation import gettext_lazy as _
 
+from .tokens import RevocableRefreshToken
+
 
 class CustomTokenObtainPairSerializer(serializers.Serializer):
     email = serializers.EmailField()
@@ -24,7 +26,9 @@ class CustomTokenObtainPairSerializer(serializers.Serializer):
                 raise serializers.ValidationError(_('Incorrect password.'))
 
             data = {}
-            refresh = RefreshToken.for_user(user)
+            refresh = RevocableRefreshToken.for_user(user)
+            # Copied into the access token; lets authentication reject inactive users without a query.
+            refresh['is_active'] = user.is_active
             data['refresh'] = str(refresh)
             data['access'] = str(refresh.access_token)
 
@@ -41,6 +45,10 @@ class CustomTokenObtainPairSerializer(serializers.Serializer):
             raise serializers.ValidationError(_('Must include "email" and "password".'))
 
 
+class CustomTokenRefreshSerializer(TokenRefreshSerializer):
+    token_class = RevocableRefreshToken
+
+
 
 
 class LogoutSerializer(serializers.Serializer):
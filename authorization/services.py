@@ -2,9 +2,9 @@ from django.contrib.auth.models import User
 from rest_framework import serializers, status
 from rest_framework.exceptions import ValidationError
 from rest_framework.response import Response
-from rest_framework_simplejwt.tokens import RefreshToken
 
 from admin_panel.services import ActivationToken
+from .tokens import RevocableRefreshToken
 
 
 def activate_user_service(token, password):
@@ -26,7 +26,7 @@ def activate_user_service(token, password):
 
 def blacklist_token_service(refresh_token):
     try:
-        token = RefreshToken(refresh_token)
+        token = RevocableRefreshToken(refresh_token)
         token.blacklist()
     except Exception as e:
         raise ValidationError("Invalid token or token is already blacklisted.")
@@ -0,0 +1,89 @@
+import hashlib
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken
+from rest_framework_simplejwt.tokens import RefreshToken
+
+
+def _hash_jti(jti):
+    return hashlib.blake2b(jti.encode(), digest_size=8).digest()
+
+
+# Per-process set of hashed blacklisted jtis. It is loaded lazily on the first refresh
+# and then synced incrementally by blacklisted_at at most every `sync_interval`
+# seconds, so on its own it can miss a token another process revoked since its last
+# sync. RevocableRefreshToken covers that window with a marker in the shared cache.
+# A hit is confirmed against the blacklist table.
+class RevocationIndex:
+    def __init__(self, sync_interval):
+        self.sync_interval = sync_interval
+        self.entries = {}
+        self.synced_until = None
+        self.next_sync = 0
+        self.lock = threading.Lock()
+
+    def _load(self, blacklisted):
+        rows = blacklisted.values_list('token__jti', 'token__expires_at', 'blacklisted_at')
+        for jti, expires_at, blacklisted_at in rows.iterator():
+            self.entries[_hash_jti(jti)] = expires_at.timestamp()
+            if self.synced_until is None or blacklisted_at > self.synced_until:
+                self.synced_until = blacklisted_at
+
+    def sync(self, force=False):
+        if not force and time.monotonic() < self.next_sync:
+            return
+        with self.lock:
+            if not force and time.monotonic() < self.next_sync:
+                return
+            blacklisted = BlacklistedToken.objects.filter(token__expires_at__gt=timezone.now())
+            if self.synced_until is not None:
+                # Overlap the last sync a little so rows committed out of order are not skipped.
+                blacklisted = blacklisted.filter(
+                    blacklisted_at__gte=self.synced_until - settings.AUTH_REVOCATION_SYNC_OVERLAP
+                )
+            self._load(blacklisted)
+            now = time.time()
+            self.entries = {key: expires_at for key, expires_at in self.entries.items() if expires_at > now}
+            self.next_sync = time.monotonic() + self.sync_interval
+
+    def add(self, jti, expires_at):
+        with self.lock:
+            self.entries[_hash_jti(jti)] = expires_at
+
+    def might_contain(self, jti):
+        self.sync()
+        return _hash_jti(jti) in self.entries
+
+    def reset(self):
+        with self.lock:
+            self.entries = {}
+            self.synced_until = None
+            self.next_sync = 0
+
+
+revocation_index = RevocationIndex(settings.AUTH_REVOCATION_SYNC_INTERVAL)
+
+
+def _revoked_key(jti):
+    return f'auth:revoked:{_hash_jti(jti).hex()}'
+
+
+class RevocableRefreshToken(RefreshToken):
+    def check_blacklist(self):
+        jti = self.payload[api_settings.JTI_CLAIM]
+        # The shared marker catches revocations made in other processes since this
+        # process last synced its index.
+        if revocation_index.might_contain(jti) or cache.get(_revoked_key(jti)):
+            super().check_blacklist()
+
+    def blacklist(self):
+        result = super().blacklist()
+        jti = self.payload[api_settings.JTI_CLAIM]
+        revocation_index.add(jti, self.payload['exp'])
+        cache.set(_revoked_key(jti), 1, settings.AUTH_REVOCATION_MARKER_TTL)
+        return result
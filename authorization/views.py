@@ -4,11 +4,11 @@ from drf_yasg.utils import swagger_auto_schema
 from rest_framework import permissions, status
 from rest_framework.response import Response
 from rest_framework.views import APIView
-from rest_framework_simplejwt.tokens import RefreshToken
 from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
 
 from .serializers import CustomTokenObtainPairSerializer, LogoutSerializer, ActivateUserSerializer
 from .services import blacklist_token_service, handle_activate_user
+from .tokens import RevocableRefreshToken
 
 
 class CustomTokenObtainPairView(TokenObtainPairView):
@@ -40,7 +40,7 @@ class CustomTokenRefreshView(TokenRefreshView):
         response = super().post(request, *args, **kwargs)
 
         try:
-            refresh_token_instance = RefreshToken(refresh_token)
+            refresh_token_instance = RevocableRefreshToken(refresh_token)
             refresh_token_instance.blacklist()
         except Exception as e:
             logger.error(f"Failed to blacklist token: {str(e)}")
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from comments.services import recompute_comment_activity_service
+
+
+class Command(BaseCommand):
+    help = 'Recompute comments_count, last_comment_at and last_comment_by on every order from the comments table'
+
+    def handle(self, *args, **options):
+        updated = recompute_comment_activity_service()
+        self.stdout.write(self.style.SUCCESS(f'Recomputed comment activity for {updated} order(s)'))
@@ -7,4 +7,9 @@ class Comment(models.Model):
     order = models.ForeignKey('orders.OrderModel', related_name='comments', on_delete=models.CASCADE)
     user = models.ForeignKey(User, on_delete=models.CASCADE)
     text = models.TextField()
-    created_at = models.DateTimeField(default=timezone.now)
\ No newline at end of file
+    created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['order', 'created_at'], name='comments_order_created_idx'),
+        ]
@@ -10,3 +10,21 @@ class CommentSerializer(serializers.ModelSerializer):
     class Meta:
         model = Comment
         fields = ['id', 'first_name', 'last_name', 'text', 'created_at', 'order']
+
+
+class CommentBatchQuerySerializer(serializers.Serializer):
+    order_ids = serializers.CharField()
+    limit = serializers.IntegerField(min_value=1, max_value=50, default=5)
+
+    max_orders = 100
+
+    def validate_order_ids(self, value):
+        try:
+            order_ids = list(dict.fromkeys(int(order_id) for order_id in value.split(',') if order_id.strip()))
+        except ValueError:
+            raise serializers.ValidationError('Order ids must be a comma-separated list of integers')
+        if not order_ids:
+            raise serializers.ValidationError('At least one order id is required')
+        if len(order_ids) > self.max_orders:
+            raise serializers.ValidationError(f'At most {self.max_orders} order ids are allowed')
+        return order_ids
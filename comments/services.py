@@ -1,40 +1,133 @@
+from django.db import transaction
+from django.db.models import Count, F, OuterRef, Q, Subquery, Value, Window
+from django.db.models.functions import Coalesce, RowNumber
+from django.utils import timezone
 from rest_framework import serializers, status
+from rest_framework.exceptions import NotFound
 from rest_framework.response import Response
 
-from orders.models import STATUS_CHOICES, OrderModel
+from admin_panel.cache import invalidate_order_statistics
+from orders.cache import bump_orders_generation
+from orders.models import OrderModel, OrderStatusCounter
 from .models import Comment
+from .serializers import CommentBatchQuerySerializer
+from .pagination import CommentCursorPagination
+
+
+def _claim_order_for_comment(order_id, user, expected_status, commented_at):
+    # One UPDATE claims the order for `user` unless another manager holds it. It also moves a
+    # new order to 'In work' and records the comment activity. Matching on the expected status
+    # keeps the status counters exact without reading the row first.
+    status_filter = Q(status__isnull=True) if expected_status is None else Q(status=expected_status)
+    new_status = 'In work' if expected_status in [None, 'New'] else expected_status
+    claimed = (
+        OrderModel.objects
+        .filter(Q(manager__isnull=True) | Q(manager=user), status_filter, pk=order_id)
+        .update(
+            manager=user,
+            status=new_status,
+            comments_count=F('comments_count') + 1,
+            last_comment_at=commented_at,
+            last_comment_by=user,
+            updated_at=timezone.now(),
+        )
+    )
+    return claimed, new_status
 
 
 def create_comment_service(order, user, comment_data):
     comment_data.pop('order', None)
     comment_data.pop('user', None)
+    commented_at = comment_data.setdefault('created_at', timezone.now())
 
-    if order.manager is not None and order.manager != user:
-        raise serializers.ValidationError('You cannot comment on this order.')
+    with transaction.atomic():
+        old_status = order.status
+        claimed, new_status = _claim_order_for_comment(order.pk, user, old_status, commented_at)
+        if not claimed:
+            # Either another manager owns the order or its status changed since it was read.
+            stored = OrderModel.objects.select_for_update().filter(pk=order.pk).values_list('status').first()
+            if stored is not None and stored[0] != old_status:
+                old_status = stored[0]
+                claimed, new_status = _claim_order_for_comment(order.pk, user, old_status, commented_at)
+            if not claimed:
+                raise serializers.ValidationError('You cannot comment on this order.')
 
-    order.manager = user
-    if order.status not in STATUS_CHOICES or order.status in [None, 'New']:
-        order.status = 'In work'
-    order.save()
+        if new_status != old_status:
+            OrderStatusCounter.adjust({old_status: -1, new_status: 1})
+        comment = Comment.objects.create(user=user, order=order, **comment_data)
+        transaction.on_commit(bump_orders_generation)
+        transaction.on_commit(invalidate_order_statistics)
 
-    comment = Comment.objects.create(user=user, order=order, **comment_data)
+    order.manager = user
+    order.status = new_status
     return comment
 
 
+def recompute_comment_activity_service():
+    comments = Comment.objects.filter(order_id=OuterRef('pk')).order_by()
+    latest = comments.order_by('-created_at', '-id')
+    with transaction.atomic():
+        updated = OrderModel.objects.update(
+            comments_count=Coalesce(Subquery(comments.values('order_id').annotate(n=Count('id')).values('n')), Value(0)),
+            last_comment_at=Subquery(latest.values('created_at')[:1]),
+            last_comment_by=Subquery(latest.values('user_id')[:1]),
+        )
+        transaction.on_commit(bump_orders_generation)
+    return updated
+
+
 def get_comment_list_service(order_id):
-    return Comment.objects.filter(order_id=order_id).order_by('-created_at')
+    return (
+        Comment.objects
+        .filter(order_id=order_id)
+        .select_related('user', 'order')
+        .only('id', 'text', 'created_at', 'order_id', 'user__first_name', 'user__last_name', 'order__utm', 'order__msg')
+        .order_by('-created_at', '-id')
+    )
 
 
-def get_comment_list_with_order_info_service(order_id):
-    comments = get_comment_list_service(order_id)
-    order = OrderModel.objects.get(id=order_id)
+def get_comment_list_with_order_info_service(order_id, request, view=None):
+    paginator = CommentCursorPagination()
+    comments = paginator.paginate_queryset(get_comment_list_service(order_id), request, view)
+
+    # Every comment row carries its order's utm/msg; only an empty page needs to look the order up.
+    if comments:
+        order = comments[0].order
+        order_info = {'utm': order.utm, 'msg': order.msg}
+    else:
+        order_info = OrderModel.objects.filter(id=order_id).values('utm', 'msg').first()
+        if order_info is None:
+            raise NotFound('Order not found')
+
     return {
+        "next": paginator.get_next_link(),
+        "previous": paginator.get_previous_link(),
         "comments": comments,
-        "utm": order.utm,
-        "msg": order.msg,
+        **order_info,
     }
 
 
+def get_latest_comments_service(order_ids, limit):
+    # One windowed query: number each order's comments newest first and keep the first `limit`.
+    comments = (
+        Comment.objects
+        .filter(order_id__in=order_ids)
+        .select_related('user')
+        .only('id', 'text', 'created_at', 'order_id', 'user__first_name', 'user__last_name')
+        .annotate(row_number=Window(
+            RowNumber(),
+            partition_by=[F('order_id')],
+            order_by=[F('created_at').desc(), F('id').desc()],
+        ))
+        .filter(row_number__lte=limit)
+        .order_by('order_id', 'row_number')
+    )
+    latest = {order_id: [] for order_id in order_ids}
+    for comment in comments:
+        latest[comment.order_id].append(comment)
+    return latest
+
+
 def handle_create_comment(serializer, user):
     order = serializer.validated_data['order']
     comment = create_comment_service(order, user, serializer.validated_data)
@@ -42,8 +135,16 @@ def handle_create_comment(serializer, user):
     return Response(serializer.data, status=status.HTTP_201_CREATED)
 
 
-def handle_list_comments(order_id, serializer_class):
-    response_data = get_comment_list_with_order_info_service(order_id)
+def handle_list_comments(request, order_id, serializer_class, view=None):
+    response_data = get_comment_list_with_order_info_service(order_id, request, view)
     serializer = serializer_class(response_data["comments"], many=True)
     response_data["comments"] = serializer.data
     return Response(response_data, status=status.HTTP_200_OK)
+
+
+def handle_list_latest_comments(request, serializer_class):
+    query = CommentBatchQuerySerializer(data=request.query_params)
+    query.is_valid(raise_exception=True)
+    latest = get_latest_comments_service(query.validated_data['order_ids'], query.validated_data['limit'])
+    results = {order_id: serializer_class(comments, many=True).data for order_id, comments in latest.items()}
+    return Response({'results': results}, status=status.HTTP_200_OK)
@@ -1,7 +1,8 @@
 from rest_framework import generics, permissions
 
 from .serializers import CommentSerializer
-from .services import handle_create_comment, get_comment_list_service, handle_list_comments
+from .services import handle_create_comment, get_comment_list_service, handle_list_comments, \
+    handle_list_latest_comments
 
 
 class CommentCreateView(generics.CreateAPIView):
@@ -20,4 +21,12 @@ class CommentListView(generics.ListAPIView):
         return get_comment_list_service(self.kwargs['order_id'])
 
     def list(self, request, *args, **kwargs):
-        return handle_list_comments(self.kwargs['order_id'], self.get_serializer_class())
+        return handle_list_comments(request, self.kwargs['order_id'], self.get_serializer_class(), self)
+
+
+class CommentBatchListView(generics.GenericAPIView):
+    serializer_class = CommentSerializer
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request, *args, **kwargs):
+        return handle_list_latest_comments(request, self.get_serializer_class())
@@ -136,7 +136,7 @@ APPEND_SLASH = True
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'authorization.authentication.CachedJWTAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.IsAuthenticated',
@@ -156,6 +156,7 @@ SIMPLE_JWT = {
     'AUTH_HEADER_TYPES': ('Bearer',),
     'AUTH_TOKEN_CLASSES': ('rest_framework_simplejwt.tokens.AccessToken',),
     'TOKEN_BLACKLIST': True,
+    'TOKEN_REFRESH_SERIALIZER': 'authorization.serializers.CustomTokenRefreshSerializer',
 }
 
 SWAGGER_SETTINGS = {
@@ -168,3 +169,32 @@ SWAGGER_SETTINGS = {
     },
     'USE_SESSION_AUTH': False,
 }
+
+ORDER_EXPORT_CHUNK_SIZE = 2000
+ORDER_EXPORT_WIDTH_SAMPLE_SIZE = 500
+ORDER_EXPORT_ROOT = BASE_DIR / 'exports'
+ORDER_EXPORT_WORKERS = 2
+ORDER_EXPORT_TTL = timedelta(hours=1)
+ORDER_EXPORT_REUSE_WINDOW = timedelta(minutes=5)
+ORDER_COUNT_CACHE_TTL = 60
+ORDER_RESPONSE_CACHE_TTL = 300
+ORDER_IMPORT_BATCH_SIZE = 1000
+ORDER_IMPORT_MAX_ERRORS = 1000
+ORDER_ROLLUP_OVERLAP = timedelta(minutes=5)
+ADMIN_STATS_DEFAULT_TTL = 60
+ADMIN_STATS_CACHE_TTLS = {
+    'order_statistics': 30,
+    'user_order_statistics': 60,
+    'managers_statistics': 30,
+    'payments_summary': 120,
+}
+ADMIN_STATS_STALE_TTL = 600
+ADMIN_STATS_LOCK_TIMEOUT = 30
+AUTH_USER_CACHE_TTL = 60
+AUTH_USER_CACHE_SIZE = 1024
+AUTH_REVOCATION_SYNC_INTERVAL = 5
+AUTH_REVOCATION_SYNC_OVERLAP = timedelta(seconds=30)
+# Revocations are also marked in the default cache for this long so other processes
+# reject the token before their next index sync. Must outlast the sync interval;
+# with a per-process cache backend, the replay window is AUTH_REVOCATION_SYNC_INTERVAL.
+AUTH_REVOCATION_MARKER_TTL = 60
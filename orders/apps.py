@@ -6,4 +6,4 @@ class OrdersConfig(AppConfig):
     name = 'orders'
 
     def ready(self):
-        pass
+        from . import signals  # noqa: F401
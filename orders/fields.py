@@ -0,0 +1,52 @@
+from django.core.exceptions import ValidationError
+from django.db import models
+from django.db.models import Case, Value, When
+
+
+# Stores one of `labels` as a small integer code and exposes the label to Python.
+# Codes are 1-based positions in `labels`, so new labels must only ever be appended.
+class CodedChoiceField(models.PositiveSmallIntegerField):
+    def __init__(self, *args, labels=(), **kwargs):
+        self.labels = list(labels)
+        self.codes = {label: code for code, label in enumerate(self.labels, 1)}
+        self.label_ranks = {label: rank for rank, label in enumerate(sorted(self.labels, key=str.casefold), 1)}
+        super().__init__(*args, **kwargs)
+
+    def deconstruct(self):
+        name, path, args, kwargs = super().deconstruct()
+        kwargs['labels'] = self.labels
+        return name, path, args, kwargs
+
+    @property
+    def validators(self):
+        return list(self._validators)
+
+    def from_db_value(self, value, expression, connection):
+        if value is None:
+            return None
+        return self.labels[value - 1]
+
+    def to_python(self, value):
+        if value is None or value in self.codes:
+            return value
+        if isinstance(value, int) and 1 <= value <= len(self.labels):
+            return self.labels[value - 1]
+        raise ValidationError(f'{self.verbose_name.capitalize()} must be one of {self.labels}', code='invalid_choice')
+
+    def get_prep_value(self, value):
+        if value is None:
+            return None
+        if hasattr(value, 'resolve_expression'):
+            return value
+        try:
+            return self.codes[value]
+        except (KeyError, TypeError):
+            raise ValueError(f'{self.name!r} must be one of {self.labels}, got {value!r}')
+
+    # Codes sort in insertion order; this ranks them by label so ordering stays alphabetical.
+    def label_order(self):
+        whens = [When(**{self.name: label}, then=Value(rank)) for label, rank in self.label_ranks.items()]
+        return Case(*whens, output_field=models.PositiveSmallIntegerField())
+
+    def value_to_string(self, obj):
+        return self.value_from_object(obj)
@@ -1,25 +1,131 @@
+import re
+
 import django_filters
+from django.core.exceptions import FieldDoesNotExist
+from django.db import connection
+from django.db.models import Case, IntegerField, Q, Value, When
+from django.db.models.expressions import RawSQL
+from rest_framework.filters import BaseFilterBackend, OrderingFilter
+
+from .fields import CodedChoiceField
 from .models import OrderModel
 
 
+def annotate_label_order(queryset, name):
+    # Returns the queryset with a sortable label rank for a coded choice column, or
+    # the column itself for any other field.
+    try:
+        field = queryset.model._meta.get_field(name)
+    except FieldDoesNotExist:
+        return queryset, name
+    if not isinstance(field, CodedChoiceField):
+        return queryset, name
+    alias = f'{name}_label_order'
+    return queryset.annotate(**{alias: field.label_order()}), alias
+
+
+class CodedChoiceFilter(django_filters.CharFilter):
+    # Matches labels case-insensitively by substring, like the old icontains filters,
+    # then filters on the codes with IN so the column index can be used.
+    def filter(self, qs, value):
+        if value in django_filters.constants.EMPTY_VALUES:
+            return qs
+        labels = OrderModel._meta.get_field(self.field_name).labels
+        terms = [term.strip().lower() for term in value.split(',') if term.strip()]
+        matches = [label for label in labels if any(term in label.lower() for term in terms)]
+        return self.get_method(qs)(**{f'{self.field_name}__in': matches})
+
+
 class OrderFilter(django_filters.FilterSet):
     name = django_filters.CharFilter(lookup_expr='icontains')
     surname = django_filters.CharFilter(lookup_expr='icontains')
     email = django_filters.CharFilter(lookup_expr='icontains')
     phone = django_filters.CharFilter(lookup_expr='icontains')
     age = django_filters.NumberFilter()
-    course = django_filters.CharFilter(lookup_expr='icontains')
-    course_format = django_filters.CharFilter(lookup_expr='icontains')
-    course_type = django_filters.CharFilter(lookup_expr='icontains')
+    course = CodedChoiceFilter()
+    course_format = CodedChoiceFilter()
+    course_type = CodedChoiceFilter()
     sum = django_filters.NumberFilter()
     alreadyPaid = django_filters.NumberFilter()
     created_at = django_filters.DateFilter()
     updated_at = django_filters.DateFilter()
-    status = django_filters.CharFilter(lookup_expr='icontains')
+    status = CodedChoiceFilter()
     group = django_filters.CharFilter(lookup_expr='icontains')
     manager = django_filters.CharFilter(field_name='manager__first_name', lookup_expr='icontains')
+    comments_count = django_filters.NumberFilter()
+    comments_count_min = django_filters.NumberFilter(field_name='comments_count', lookup_expr='gte')
+    last_comment_at = django_filters.DateFilter(lookup_expr='date')
+    last_comment_after = django_filters.DateTimeFilter(field_name='last_comment_at', lookup_expr='gte')
+    last_comment_before = django_filters.DateTimeFilter(field_name='last_comment_at', lookup_expr='lt')
+    last_comment_by = django_filters.CharFilter(field_name='last_comment_by__first_name', lookup_expr='icontains')
 
     class Meta:
         model = OrderModel
         fields = ['name', 'surname', 'email', 'phone', 'age', 'course', 'course_format', 'course_type',
-                  'sum', 'alreadyPaid', 'created_at', 'updated_at', 'status', 'group', 'manager']
+                  'sum', 'alreadyPaid', 'created_at', 'updated_at', 'status', 'group', 'manager',
+                  'comments_count', 'last_comment_at', 'last_comment_by']
+
+
+class OrderOrderingFilter(OrderingFilter):
+    # Coded choice columns hold integer codes, so they are ordered by label rank instead.
+    def filter_queryset(self, request, queryset, view):
+        ordering = self.get_ordering(request, queryset, view)
+        if not ordering:
+            return queryset
+
+        terms = []
+        for term in ordering:
+            queryset, name = annotate_label_order(queryset, term.lstrip('-'))
+            terms.append(f'-{name}' if term.startswith('-') else name)
+        return queryset.order_by(*terms)
+
+
+class OrderSearchFilter(BaseFilterBackend):
+    search_param = 'search'
+    ordering_param = 'ordering'
+    search_fields = ['name', 'surname', 'email', 'phone']
+    min_token_size = 2
+
+    def get_search_terms(self, request):
+        terms = re.sub(r'[+\-<>()~*"@]', ' ', request.query_params.get(self.search_param, ''))
+        return terms.split()
+
+    def get_fulltext_rank(self, terms):
+        terms = [term for term in terms if len(term) >= self.min_token_size]
+        if not terms:
+            return None
+        table = connection.ops.quote_name(OrderModel._meta.db_table)
+        columns = ', '.join(f'{table}.{connection.ops.quote_name(field)}' for field in self.search_fields)
+        query = ' '.join(f'+"{term}"' for term in terms)
+        return RawSQL(f'MATCH ({columns}) AGAINST (%s IN BOOLEAN MODE)', [query])
+
+    def get_fallback_rank(self, terms):
+        rank = Value(0)
+        for term in terms:
+            for field in self.search_fields:
+                rank = rank + Case(
+                    When(**{f'{field}__icontains': term}, then=Value(1)),
+                    default=Value(0),
+                    output_field=IntegerField(),
+                )
+        return rank
+
+    def filter_queryset(self, request, queryset, view):
+        terms = self.get_search_terms(request)
+        if not terms:
+            return queryset
+
+        rank = self.get_fulltext_rank(terms) if connection.vendor == 'mysql' else None
+        if rank is not None:
+            queryset = queryset.annotate(search_rank=rank).filter(search_rank__gt=0)
+        else:
+            queryset = queryset.annotate(search_rank=self.get_fallback_rank(terms))
+            for term in terms:
+                condition = Q()
+                for field in self.search_fields:
+                    condition |= Q(**{f'{field}__icontains': term})
+                queryset = queryset.filter(condition)
+
+        if not request.query_params.get(self.ordering_param):
+            queryset = queryset.order_by('-search_rank', '-id')
+        return queryset
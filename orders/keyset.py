@@ -0,0 +1,123 @@
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import F, Q
+
+
+# Keyset ("seek") helpers shared by cursor pagination and exports. Rows are walked
+# by their ordering keys with `id` as the tie-breaker, so every batch is an index seek
+# plus LIMIT instead of a growing OFFSET or one huge buffered result set.
+
+
+def is_nullable(model, field):
+    try:
+        return model._meta.get_field(field).null
+    except FieldDoesNotExist:
+        # Annotations may evaluate to NULL.
+        return True
+
+
+def keyset_order_by(field, descending):
+    if field == 'id':
+        return [F('id').desc() if descending else F('id').asc()]
+    if descending:
+        return [F(field).desc(nulls_last=True), F('id').desc()]
+    return [F(field).asc(nulls_first=True), F('id').asc()]
+
+
+def keyset_filter(field, value, pk, descending, nullable=False):
+    after_pk = Q(id__lt=pk) if descending else Q(id__gt=pk)
+    if field == 'id':
+        return after_pk
+
+    if value is None:
+        # NULLs sort last when descending and first when ascending.
+        same_value = Q(**{f'{field}__isnull': True}) & after_pk
+        return same_value if descending else same_value | Q(**{f'{field}__isnull': False})
+
+    if descending:
+        keyset = Q(**{f'{field}__lte': value}) & (Q(**{f'{field}__lt': value}) | after_pk)
+    else:
+        keyset = Q(**{f'{field}__gte': value}) & (Q(**{f'{field}__gt': value}) | after_pk)
+    if descending and nullable:
+        keyset |= Q(**{f'{field}__isnull': True})
+    return keyset
+
+
+def get_keyset_ordering(queryset):
+    # Returns the queryset's ordering as [(column, descending, nullable)] with `id`
+    # appended as the tie-breaker, so a keyset walk returns rows in the same order.
+    terms = []
+    for term in queryset.query.order_by:
+        if not isinstance(term, str) or term == '?':
+            raise ValueError(f'Cannot walk {term!r} ordering by keyset')
+        descending = term.startswith('-')
+        name = term.lstrip('-')
+        if name == 'pk':
+            name = 'id'
+        elif name not in queryset.query.annotations and '__' not in name:
+            field = queryset.model._meta.get_field(name)
+            if field.is_relation:
+                # Ordering by a foreign key sorts by its column.
+                name = field.attname
+        if name not in [column for column, _, _ in terms]:
+            terms.append((name, descending, name != 'id' and is_nullable(queryset.model, name)))
+        if name == 'id':
+            break
+    if not terms or terms[-1][0] != 'id':
+        terms.append(('id', terms[0][1] if terms else False, False))
+    return terms
+
+
+def _seek_after(column, descending, nullable, value):
+    # Rows strictly after `value` in this column, with NULLs first ascending and last descending.
+    if value is None:
+        return None if descending else Q(**{f'{column}__isnull': False})
+    after = Q(**{f'{column}__lt' if descending else f'{column}__gt': value})
+    if descending and nullable:
+        after |= Q(**{f'{column}__isnull': True})
+    return after
+
+
+def keyset_seek(terms, values):
+    # (a, b, id) > (x, y, pk) expanded as a OR b ... so it works for mixed directions.
+    seek = None
+    same = Q()
+    for (column, descending, nullable), value in zip(terms, values):
+        after = _seek_after(column, descending, nullable, value)
+        if after is not None:
+            seek = same & after if seek is None else seek | (same & after)
+        same &= Q(**{f'{column}__isnull': True}) if value is None else Q(**{column: value})
+
+    # Bounding the leading column as well lets the database seek on its index.
+    column, descending, nullable = terms[0]
+    if len(terms) > 1 and values[0] is not None:
+        bound = Q(**{f'{column}__lte' if descending else f'{column}__gte': values[0]})
+        if descending and nullable:
+            bound |= Q(**{f'{column}__isnull': True})
+        seek = bound & seek
+    return seek
+
+
+def iter_keyset(queryset, fields, chunk_size):
+    terms = get_keyset_ordering(queryset)
+    columns = list(dict.fromkeys([*fields, *(column for column, _, _ in terms)]))
+    key_indexes = [columns.index(column) for column, _, _ in terms]
+
+    order_by = []
+    for column, descending, nullable in terms:
+        if not nullable:
+            order_by.append(F(column).desc() if descending else F(column).asc())
+        elif descending:
+            order_by.append(F(column).desc(nulls_last=True))
+        else:
+            order_by.append(F(column).asc(nulls_first=True))
+    queryset = queryset.order_by(*order_by)
+
+    batch = list(queryset.values_list(*columns)[:chunk_size])
+    while batch:
+        for row in batch:
+            yield row[:len(fields)]
+        if len(batch) < chunk_size:
+            return
+        last = batch[-1]
+        seek = keyset_seek(terms, [last[index] for index in key_indexes])
+        batch = list(queryset.filter(seek).values_list(*columns)[:chunk_size])
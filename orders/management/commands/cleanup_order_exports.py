@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from orders.services import cleanup_expired_export_jobs_service
+
+
+class Command(BaseCommand):
+    help = 'Delete expired order export jobs and their files'
+
+    def handle(self, *args, **options):
+        removed = cleanup_expired_export_jobs_service()
+        self.stdout.write(self.style.SUCCESS(f'Removed {removed} expired export job(s)'))
@@ -0,0 +1,109 @@
+import itertools
+import json
+import random
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from orders.filters import OrderFilter
+from orders.models import OrderModel
+
+ORDERINGS = ['-id', 'created_at', '-created_at', 'sum', '-sum', 'status', 'updated_at']
+
+
+def _sample_filter_values():
+    values = {}
+    for name, order_filter in OrderFilter.base_filters.items():
+        field_name = order_filter.field_name
+        value = (
+            OrderModel.objects
+            .exclude(**{f'{field_name}__isnull': True})
+            .values_list(field_name, flat=True)
+            .order_by()
+            .first()
+        )
+        if value is None:
+            continue
+        if hasattr(value, 'date'):
+            value = value.date().isoformat()
+        values[name] = str(value)
+    return values
+
+
+def _walk_mysql_plan(node, table, result):
+    if isinstance(node, dict):
+        if node.get('using_filesort'):
+            result['sort'] = True
+        if node.get('table_name') == table and node.get('access_type') == 'ALL':
+            result['scan'] = True
+        for child in node.values():
+            _walk_mysql_plan(child, table, result)
+    elif isinstance(node, list):
+        for child in node:
+            _walk_mysql_plan(child, table, result)
+
+
+def analyze_plan(queryset):
+    table = OrderModel._meta.db_table
+    result = {'scan': False, 'sort': False}
+
+    if connection.vendor == 'mysql':
+        plan = queryset.explain(format='json')
+        _walk_mysql_plan(json.loads(plan), table, result)
+    elif connection.vendor == 'postgresql':
+        plan = queryset.explain()
+        result['scan'] = f'Seq Scan on {table}' in plan
+        result['sort'] = 'Sort Key' in plan
+    else:
+        plan = queryset.explain()
+        result['scan'] = any(
+            line.strip().endswith(f'SCAN {table}') for line in plan.splitlines()
+        )
+        result['sort'] = 'TEMP B-TREE FOR ORDER BY' in plan
+
+    return result, plan
+
+
+class Command(BaseCommand):
+    help = 'Replay sample order filter/ordering combinations and report the ones that scan the whole table'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--pairs', type=int, default=20,
+                            help='Number of random two-filter combinations to replay')
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--show-plans', action='store_true', help='Print the EXPLAIN output of every query')
+
+    def handle(self, *args, **options):
+        values = _sample_filter_values()
+        if not values:
+            self.stdout.write(self.style.WARNING('No orders to sample filter values from'))
+            return
+
+        rng = random.Random(options['seed'])
+        combinations = [{}] + [{name: value} for name, value in values.items()]
+        pairs = list(itertools.combinations(sorted(values), 2))
+        for first, second in rng.sample(pairs, min(options['pairs'], len(pairs))):
+            combinations.append({first: values[first], second: values[second]})
+
+        scans = 0
+        total = 0
+        for params, ordering in itertools.product(combinations, ORDERINGS):
+            queryset = OrderFilter(params, queryset=OrderModel.objects.all()).qs.order_by(ordering)
+            result, plan = analyze_plan(queryset[:25])
+            total += 1
+
+            label = '&'.join(f'{name}={value}' for name, value in params.items()) or '(no filter)'
+            label = f'{label} ordering={ordering}'
+            if result['scan']:
+                scans += 1
+                sort = ' + filesort' if result['sort'] else ''
+                self.stdout.write(self.style.WARNING(f'FULL SCAN{sort}: {label}'))
+            elif options['verbosity'] > 1:
+                sort = ' (filesort)' if result['sort'] else ''
+                self.stdout.write(f'index{sort}: {label}')
+
+            if options['show_plans']:
+                self.stdout.write(plan)
+
+        style = self.style.WARNING if scans else self.style.SUCCESS
+        self.stdout.write(style(f'{scans} of {total} combinations scan the full {OrderModel._meta.db_table} table'))
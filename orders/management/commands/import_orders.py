@@ -0,0 +1,38 @@
+import json
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+
+from orders.services import import_orders_service, iter_import_rows
+
+IMPORT_FORMATS = ['csv', 'ndjson', 'json']
+
+
+class Command(BaseCommand):
+    help = 'Bulk import orders from a CSV, NDJSON or JSON array file'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path')
+        parser.add_argument('--format', choices=IMPORT_FORMATS,
+                            help='File format, guessed from the extension when omitted')
+        parser.add_argument('--batch-size', type=int)
+
+    def handle(self, *args, **options):
+        path = options['path']
+        import_format = options['format'] or os.path.splitext(path)[1].lstrip('.').lower()
+        if import_format not in IMPORT_FORMATS:
+            raise CommandError(f'Cannot guess the format of {path}, pass --format')
+
+        with open(path, encoding='utf-8', newline='') as file:
+            if import_format == 'json':
+                rows = json.load(file)
+                if not isinstance(rows, list):
+                    raise CommandError('Expected a JSON array of orders')
+            else:
+                rows = iter_import_rows(import_format, file)
+            result = import_orders_service(rows, options['batch_size'])
+
+        for error in result['errors']:
+            self.stderr.write(f"row {error['row']}: {json.dumps(error['errors'])}")
+        style = self.style.WARNING if result['failed'] else self.style.SUCCESS
+        self.stdout.write(style(f"Created {result['created']} order(s), {result['failed']} row(s) failed"))
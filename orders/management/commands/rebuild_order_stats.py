@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from orders.services import rebuild_status_counters_service
+
+
+class Command(BaseCommand):
+    help = 'Recompute the order status counters from the orders table and report any drift'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='Only report drift, do not store the recount')
+
+    def handle(self, *args, **options):
+        drift = rebuild_status_counters_service(dry_run=options['dry_run'])
+        for row in drift:
+            status = row['status'] if row['status'] is not None else 'null'
+            self.stdout.write(self.style.WARNING(f"{status}: stored {row['stored']}, actual {row['actual']}"))
+
+        if not drift:
+            self.stdout.write(self.style.SUCCESS('Order status counters are in sync'))
+        elif options['dry_run']:
+            self.stdout.write(self.style.WARNING(f'{len(drift)} counter(s) drifted'))
+        else:
+            self.stdout.write(self.style.SUCCESS(f'Rebuilt {len(drift)} drifted counter(s)'))
@@ -0,0 +1,29 @@
+from django.db import migrations
+
+FULLTEXT_INDEX = 'orders_contact_ft_idx'
+
+
+def create_fulltext_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'mysql':
+        return
+    schema_editor.execute(
+        f'ALTER TABLE `orders` ADD FULLTEXT INDEX `{FULLTEXT_INDEX}` '
+        f'(`name`, `surname`, `email`, `phone`) WITH PARSER ngram'
+    )
+
+
+def drop_fulltext_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'mysql':
+        return
+    schema_editor.execute(f'ALTER TABLE `orders` DROP INDEX `{FULLTEXT_INDEX}`')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0006_ordermodel_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_fulltext_index, drop_fulltext_index),
+    ]
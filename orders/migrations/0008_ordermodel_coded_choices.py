@@ -0,0 +1,101 @@
+from django.db import migrations, models
+from django.db.models import Count
+
+import orders.fields
+
+CODED_FIELDS = {
+    'status': ['In work', 'New', 'Agree', 'Disagree', 'Dubbing'],
+    'course': ['FS', 'QACX', 'JCX', 'JSCX', 'FE', 'PCX'],
+    'course_format': ['static', 'online'],
+    'course_type': ['pro', 'minimal', 'premium', 'incubator', 'vip'],
+}
+
+
+def _label_mapping(OrderModel, name, labels):
+    # Maps each stored value to its label, ignoring case and surrounding spaces;
+    # blank values become NULL. Values that match no label are returned separately.
+    by_key = {label.casefold(): label for label in labels}
+    mapping, unmapped = {}, {}
+    rows = OrderModel.objects.exclude(**{f'{name}__isnull': True}).values_list(name).annotate(n=Count('id'))
+    for value, count in rows.order_by():
+        key = value.strip().casefold()
+        if not key:
+            mapping[value] = None
+        elif key in by_key:
+            mapping[value] = by_key[key]
+        else:
+            unmapped[value] = unmapped.get(value, 0) + count
+    return mapping, unmapped
+
+
+def check_labels(apps, schema_editor):
+    # Runs before any column changes so unknown values stop the migration with nothing lost.
+    OrderModel = apps.get_model('orders', 'OrderModel')
+    problems = []
+    for name, labels in CODED_FIELDS.items():
+        _, unmapped = _label_mapping(OrderModel, name, labels)
+        problems += [f'{name}={value!r} ({count} rows)' for value, count in sorted(unmapped.items())]
+    if problems:
+        raise ValueError(
+            'Orders hold values that match no label and would be lost: ' + ', '.join(problems)
+            + '. Fix or clear them, then run the migration again.'
+        )
+
+
+def copy_labels_to_codes(apps, schema_editor):
+    OrderModel = apps.get_model('orders', 'OrderModel')
+    for name, labels in CODED_FIELDS.items():
+        mapping, _ = _label_mapping(OrderModel, name, labels)
+        for value, label in mapping.items():
+            if label is not None:
+                OrderModel.objects.filter(**{name: value}).update(**{f'{name}_code': label})
+
+
+def copy_codes_to_labels(apps, schema_editor):
+    OrderModel = apps.get_model('orders', 'OrderModel')
+    for name, labels in CODED_FIELDS.items():
+        for label in labels:
+            OrderModel.objects.filter(**{f'{name}_code': label}).update(**{name: label})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0007_ordermodel_fulltext_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(check_labels, migrations.RunPython.noop),
+        migrations.RemoveIndex(model_name='ordermodel', name='orders_status_created_idx'),
+        migrations.RemoveIndex(model_name='ordermodel', name='orders_manager_status_idx'),
+        migrations.RemoveIndex(model_name='ordermodel', name='orders_course_type_idx'),
+        *[
+            migrations.AddField(
+                model_name='ordermodel',
+                name=f'{name}_code',
+                field=orders.fields.CodedChoiceField(blank=True, labels=labels, null=True),
+            )
+            for name, labels in CODED_FIELDS.items()
+        ],
+        migrations.RunPython(copy_labels_to_codes, copy_codes_to_labels),
+        *[
+            migrations.RemoveField(model_name='ordermodel', name=name)
+            for name in CODED_FIELDS
+        ],
+        *[
+            migrations.RenameField(model_name='ordermodel', old_name=f'{name}_code', new_name=name)
+            for name in CODED_FIELDS
+        ],
+        migrations.AddIndex(
+            model_name='ordermodel',
+            index=models.Index(fields=['status', 'created_at'], name='orders_status_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='ordermodel',
+            index=models.Index(fields=['manager', 'status'], name='orders_manager_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='ordermodel',
+            index=models.Index(fields=['course', 'course_type'], name='orders_course_type_idx'),
+        ),
+    ]
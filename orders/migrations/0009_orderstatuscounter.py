@@ -0,0 +1,39 @@
+# Generated by Django 5.1 on 2026-10-18 02:45
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def seed_status_counters(apps, schema_editor):
+    OrderModel = apps.get_model('orders', 'OrderModel')
+    OrderStatusCounter = apps.get_model('orders', 'OrderStatusCounter')
+    status_field = OrderModel._meta.get_field('status')
+
+    counts = dict(OrderModel.objects.order_by().values_list('status').annotate(count=Count('id')))
+    counters = [OrderStatusCounter(status_code=0, count=counts.get(None, 0))]
+    counters += [
+        OrderStatusCounter(status_code=code, count=counts.get(label, 0))
+        for label, code in status_field.codes.items()
+    ]
+    OrderStatusCounter.objects.bulk_create(counters)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0008_ordermodel_coded_choices'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OrderStatusCounter',
+            fields=[
+                ('status_code', models.PositiveSmallIntegerField(primary_key=True, serialize=False)),
+                ('count', models.BigIntegerField(default=0)),
+            ],
+            options={
+                'db_table': 'order_status_counters',
+            },
+        ),
+        migrations.RunPython(seed_status_counters, migrations.RunPython.noop),
+    ]
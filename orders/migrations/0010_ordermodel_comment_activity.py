@@ -0,0 +1,51 @@
+# Generated by Django 5.1 on 2026-10-18 02:51
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def fill_comment_activity(apps, schema_editor):
+    OrderModel = apps.get_model('orders', 'OrderModel')
+    Comment = apps.get_model('comments', 'Comment')
+    comments = Comment.objects.filter(order_id=OuterRef('pk')).order_by()
+    latest = comments.order_by('-created_at', '-id')
+    OrderModel.objects.update(
+        comments_count=Coalesce(Subquery(comments.values('order_id').annotate(n=Count('id')).values('n')), Value(0)),
+        last_comment_at=Subquery(latest.values('created_at')[:1]),
+        last_comment_by=Subquery(latest.values('user_id')[:1]),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0009_orderstatuscounter'),
+        ('comments', '0003_comment_order_created_idx'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='ordermodel',
+            name='comments_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='ordermodel',
+            name='last_comment_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='ordermodel',
+            name='last_comment_by',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddIndex(
+            model_name='ordermodel',
+            index=models.Index(fields=['last_comment_at'], name='orders_last_comment_idx'),
+        ),
+        migrations.RunPython(fill_comment_activity, migrations.RunPython.noop),
+    ]
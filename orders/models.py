@@ -1,11 +1,17 @@
-from django.db import models
+import uuid
+
+from django.db import models, transaction
+from django.db.models import F
 from django.contrib.auth.models import User
 from django.core.exceptions import ValidationError
 
+from .fields import CodedChoiceField
+
 STATUS_CHOICES = ['In work', 'New', 'Agree', 'Disagree', 'Dubbing']
 COURSE_CHOICES = ['FS', 'QACX', 'JCX', 'JSCX', 'FE', 'PCX']
 COURSE_TYPE_CHOICES = ['pro', 'minimal', 'premium', 'incubator', 'vip']
 COURSE_FORMAT_CHOICES = ['static', 'online']
+COMMENT_ACTIVITY_FIELDS = ['comments_count', 'last_comment_at', 'last_comment_by']
 
 
 class OrderModel(models.Model):
@@ -14,18 +20,21 @@ class OrderModel(models.Model):
     email = models.EmailField(blank=True, null=True)
     phone = models.CharField(max_length=120, blank=True, null=True)
     age = models.IntegerField(blank=True, null=True)
-    course = models.CharField(max_length=120, blank=True, null=True)
-    course_format = models.CharField(max_length=120, blank=True, null=True)
-    course_type = models.CharField(max_length=120, blank=True, null=True)
+    course = CodedChoiceField(labels=COURSE_CHOICES, blank=True, null=True)
+    course_format = CodedChoiceField(labels=COURSE_FORMAT_CHOICES, blank=True, null=True)
+    course_type = CodedChoiceField(labels=COURSE_TYPE_CHOICES, blank=True, null=True)
     sum = models.IntegerField(blank=True, null=True)
     alreadyPaid = models.IntegerField(default=0, blank=True, null=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     utm = models.CharField(max_length=120, blank=True, null=True)
     msg = models.CharField(max_length=120, blank=True, null=True)
-    status = models.CharField(max_length=20, null=True, blank=True)
+    status = CodedChoiceField(labels=STATUS_CHOICES, null=True, blank=True)
     group = models.CharField(max_length=120, blank=True, null=True)
     manager = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True)
+    comments_count = models.PositiveIntegerField(default=0)
+    last_comment_at = models.DateTimeField(blank=True, null=True)
+    last_comment_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
 
     def clean(self):
         if self.status and self.status not in STATUS_CHOICES:
@@ -37,12 +46,123 @@ class OrderModel(models.Model):
         if self.course_type and self.course_type not in COURSE_TYPE_CHOICES:
             raise ValidationError(f'Course type must be one of {COURSE_TYPE_CHOICES}')
 
+    def _lock_stored_status(self):
+        # Locks the row for the rest of the transaction so the counters move from the status
+        # actually being overwritten, not from whatever this instance was loaded with.
+        stored = OrderModel.objects.select_for_update().filter(pk=self.pk).values_list('status').first()
+        return stored[0] if stored is not None else None
+
     def save(self, *args, **kwargs):
         self.clean()
-        super(OrderModel, self).save(*args, **kwargs)
+        adding = self._state.adding
+        update_fields = kwargs.get('update_fields')
+        # Deferred fields are not written by save(), see Model.save().
+        tracks_status = (
+            'status' not in self.get_deferred_fields()
+            and (update_fields is None or 'status' in update_fields)
+        )
+
+        # Comment activity is only ever written with F() updates by the comment flow,
+        # so a full save must not put back the values loaded with this instance.
+        if not adding and update_fields is None and not kwargs.get('force_insert'):
+            deferred = self.get_deferred_fields()
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.attname not in deferred and field.name not in COMMENT_ACTIVITY_FIELDS
+            ]
+
+        with transaction.atomic():
+            old_status = None if adding or not tracks_status else self._lock_stored_status()
+            super(OrderModel, self).save(*args, **kwargs)
+            if adding:
+                OrderStatusCounter.adjust({self.status: 1})
+            elif tracks_status and old_status != self.status:
+                OrderStatusCounter.adjust({old_status: -1, self.status: 1})
 
     def __str__(self):
         return f"{self.name} {self.surname}"
 
     class Meta:
         db_table = 'orders'
+        indexes = [
+            models.Index(fields=['status', 'created_at'], name='orders_status_created_idx'),
+            models.Index(fields=['manager', 'status'], name='orders_manager_status_idx'),
+            models.Index(fields=['course', 'course_type'], name='orders_course_type_idx'),
+            models.Index(fields=['group'], name='orders_group_idx'),
+            models.Index(fields=['email'], name='orders_email_idx'),
+            models.Index(fields=['phone'], name='orders_phone_idx'),
+            models.Index(fields=['last_comment_at'], name='orders_last_comment_idx'),
+            models.Index(fields=['created_at'], name='orders_created_idx'),
+            models.Index(fields=['updated_at', 'created_at'], name='orders_updated_created_idx'),
+        ]
+
+
+# Number of orders per status, kept in step with every order write so the
+# statistics endpoint never has to scan the orders table.
+class OrderStatusCounter(models.Model):
+    NULL_STATUS_CODE = 0
+
+    status_code = models.PositiveSmallIntegerField(primary_key=True)
+    count = models.BigIntegerField(default=0)
+
+    @classmethod
+    def code_for(cls, status):
+        if status is None:
+            return cls.NULL_STATUS_CODE
+        return OrderModel._meta.get_field('status').codes[status]
+
+    @classmethod
+    def label_for(cls, status_code):
+        if status_code == cls.NULL_STATUS_CODE:
+            return None
+        return OrderModel._meta.get_field('status').labels[status_code - 1]
+
+    # Applies {status: delta} inside the caller's transaction. Rows are updated in
+    # status code order so concurrent transitions lock them in the same order.
+    @classmethod
+    def adjust(cls, deltas):
+        by_code = sorted((cls.code_for(status), delta) for status, delta in deltas.items())
+        for code, delta in by_code:
+            if not delta:
+                continue
+            if cls.objects.filter(pk=code).update(count=F('count') + delta):
+                continue
+            # Rows are seeded for every known status; this only runs for a newly appended one.
+            with transaction.atomic():
+                counter, created = cls.objects.get_or_create(pk=code, defaults={'count': delta})
+            if not created:
+                cls.objects.filter(pk=code).update(count=F('count') + delta)
+
+    def __str__(self):
+        return f"{self.label_for(self.status_code)}: {self.count}"
+
+    class Meta:
+        db_table = 'order_status_counters'
+
+
+class OrderExportJob(models.Model):
+    JOB_STATUS_CHOICES = (
+        ('pending', 'Pending'),
+        ('running', 'Running'),
+        ('done', 'Done'),
+        ('failed', 'Failed'),
+    )
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    params = models.JSONField(default=dict)
+    params_hash = models.CharField(max_length=64, db_index=True)
+    status = models.CharField(max_length=20, choices=JOB_STATUS_CHOICES, default='pending')
+    rows_done = models.PositiveIntegerField(default=0)
+    rows_total = models.PositiveIntegerField(null=True, blank=True)
+    file_path = models.CharField(max_length=255, blank=True)
+    error = models.TextField(blank=True)
+    created_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    expires_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"{self.id} {self.status}"
+
+    class Meta:
+        db_table = 'order_export_jobs'
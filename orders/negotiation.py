@@ -0,0 +1,6 @@
+from rest_framework.negotiation import DefaultContentNegotiation
+
+
+class ExportContentNegotiation(DefaultContentNegotiation):
+    def filter_renderers(self, renderers, format):
+        return renderers
@@ -0,0 +1,186 @@
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+
+from django.core.paginator import Page
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+from .filters import OrderSearchFilter, annotate_label_order
+from .keyset import is_nullable, keyset_filter, keyset_order_by
+from .services import estimate_queryset_count
+
+
+class UncountedPage(Page):
+    def __init__(self, object_list, number, has_next):
+        super().__init__(object_list, number, paginator=None)
+        self._has_next = has_next
+
+    def has_next(self):
+        return self._has_next
+
+    def next_page_number(self):
+        return self.number + 1
+
+    def previous_page_number(self):
+        return self.number - 1
+
+
+class OrderPagination(PageNumberPagination):
+    page_size = 25
+    count_query_param = 'count'
+    count_modes = ['exact', 'estimate', 'none']
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.count_mode = request.query_params.get(self.count_query_param) or 'exact'
+        if self.count_mode not in self.count_modes:
+            raise ValidationError({self.count_query_param: f'Count must be one of {self.count_modes}'})
+        if self.count_mode == 'exact':
+            return super().paginate_queryset(queryset, request, view)
+
+        self.request = request
+        try:
+            page_number = int(request.query_params.get(self.page_query_param) or 1)
+            if page_number < 1:
+                raise ValueError
+        except ValueError:
+            raise NotFound(self.invalid_page_message)
+
+        offset = (page_number - 1) * self.page_size
+        rows = list(queryset[offset:offset + self.page_size + 1])
+        if not rows and page_number > 1:
+            raise NotFound(self.invalid_page_message)
+
+        self.page = UncountedPage(rows[:self.page_size], page_number, has_next=len(rows) > self.page_size)
+        self.count = estimate_queryset_count(queryset) if self.count_mode == 'estimate' else None
+        return list(self.page)
+
+    def get_paginated_response(self, data):
+        if self.count_mode == 'exact':
+            return super().get_paginated_response(data)
+        return Response({
+            'count': self.count,
+            'has_next': self.page.has_next(),
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        })
+
+
+class OrderCursorPagination(BasePagination):
+    page_size = 25
+    cursor_query_param = 'cursor'
+    ordering_param = 'ordering'
+    ordering_fields = ['id', 'created_at', 'updated_at', 'sum', 'status', 'comments_count', 'last_comment_at']
+    default_ordering = '-id'
+    invalid_cursor_message = 'Invalid cursor'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.model = queryset.model
+        self.field, self.descending = self.get_ordering(request)
+        self.cursor = self.decode_cursor(request)
+        queryset, self.sort_key = annotate_label_order(queryset, self.field)
+
+        reverse = self.cursor is not None and self.cursor['p']
+        descending = self.descending != reverse
+
+        if self.cursor is not None:
+            queryset = queryset.filter(self._keyset_filter(self.cursor['v'], self.cursor['id'], descending))
+        queryset = queryset.order_by(*self._order_by(descending))
+
+        results = list(queryset[:self.page_size + 1])
+        has_more = len(results) > self.page_size
+        results = results[:self.page_size]
+        if reverse:
+            results.reverse()
+            self.has_next, self.has_previous = True, has_more
+        else:
+            self.has_next, self.has_previous = has_more, self.cursor is not None
+
+        self.page = results
+        return results
+
+    def get_ordering(self, request):
+        ordering = request.query_params.get(self.ordering_param)
+        if not ordering and OrderSearchFilter().get_search_terms(request):
+            # Search results are ranked by relevance, which has no stable cursor key.
+            raise ValidationError({
+                self.ordering_param: 'Cursor pagination of search results requires an explicit ordering'
+            })
+        ordering = ordering or self.default_ordering
+        ordering = ordering.split(',')[0].strip()
+        field = ordering.lstrip('-')
+        if field not in self.ordering_fields:
+            raise ValidationError({
+                self.ordering_param: f'Cursor pagination supports ordering by {self.ordering_fields}'
+            })
+        return field, ordering.startswith('-')
+
+    def _order_by(self, descending):
+        return keyset_order_by(self.sort_key, descending)
+
+    def _keyset_filter(self, value, pk, descending):
+        if self.sort_key != self.field and value is not None:
+            # Cursors carry the label; coded columns are sorted by its rank.
+            value = self.model._meta.get_field(self.field).label_ranks[value]
+        nullable = is_nullable(self.model, self.field)
+        return keyset_filter(self.sort_key, value, pk, descending, nullable=nullable)
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+
+        try:
+            cursor = json.loads(urlsafe_b64decode(encoded.encode('ascii')))
+            value = cursor['v']
+            if value is not None:
+                value = self.model._meta.get_field(self.field).to_python(value)
+            return {'v': value, 'id': int(cursor['id']), 'p': bool(cursor.get('p'))}
+        except Exception:
+            raise NotFound(self.invalid_cursor_message)
+
+    def encode_cursor(self, instance, previous):
+        if not isinstance(instance, dict):
+            instance = {'id': instance.id, self.field: getattr(instance, self.field)}
+        value = instance[self.field]
+        if hasattr(value, 'isoformat'):
+            value = value.isoformat()
+        cursor = {'v': value, 'id': instance['id']}
+        if previous:
+            cursor['p'] = 1
+        encoded = urlsafe_b64encode(json.dumps(cursor, separators=(',', ':')).encode()).decode('ascii')
+        return replace_query_param(self.base_url, self.cursor_query_param, encoded)
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(self.page[-1], previous=False)
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        if not self.page:
+            return remove_query_param(self.base_url, self.cursor_query_param)
+        return self.encode_cursor(self.page[0], previous=True)
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
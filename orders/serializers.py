@@ -1,23 +1,36 @@
-from rest_framework import serializers
-from .models import OrderModel
-
+import functools
 
-STATUS_CHOICES = ['In work', 'New', 'Agree', 'Disagree', 'Dubbing']
-COURSE_CHOICES = ['FS', 'QACX', 'JCX', 'JSCX', 'FE', 'PCX']
-COURSE_TYPE_CHOICES = ['pro', 'minimal', 'premium', 'incubator', 'vip']
-COURSE_FORMAT_CHOICES = ['static', 'online']
+from django.contrib.auth.models import User
+from django.urls import reverse
+from rest_framework import serializers
+from .models import (
+    OrderModel, OrderExportJob, STATUS_CHOICES, COURSE_CHOICES, COURSE_TYPE_CHOICES, COURSE_FORMAT_CHOICES,
+)
 
 
 class OrderSerializer(serializers.ModelSerializer):
+    course = serializers.CharField(max_length=120, allow_blank=True, allow_null=True, required=False)
+    course_format = serializers.CharField(max_length=120, allow_blank=True, allow_null=True, required=False)
+    course_type = serializers.CharField(max_length=120, allow_blank=True, allow_null=True, required=False)
+    status = serializers.CharField(max_length=20, allow_blank=True, allow_null=True, required=False)
     manager = serializers.CharField(source='manager.first_name', read_only=True)
+    last_comment_by = serializers.CharField(source='last_comment_by.first_name', read_only=True)
 
     class Meta:
         model = OrderModel
         fields = [
             'id', 'name', 'surname', 'email', 'phone', 'age', 'course', 'course_format',
-            'course_type', 'sum', 'alreadyPaid', 'created_at', 'updated_at', 'status', 'group', 'manager'
+            'course_type', 'sum', 'alreadyPaid', 'created_at', 'updated_at', 'status', 'group', 'manager',
+            'comments_count', 'last_comment_at', 'last_comment_by'
         ]
-        read_only_fields = ['comments']
+        read_only_fields = ['comments', 'comments_count', 'last_comment_at']
+
+    def __init__(self, *args, **kwargs):
+        fields = kwargs.pop('fields', None)
+        super().__init__(*args, **kwargs)
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
 
     def create(self, validated_data):
         return super().create(validated_data)
@@ -51,5 +64,102 @@ class OrderSerializer(serializers.ModelSerializer):
         return value
 
 
+class OrderBulkPatchSerializer(serializers.Serializer):
+    status = serializers.CharField(max_length=20, allow_null=True, required=False)
+    group = serializers.CharField(max_length=120, allow_null=True, required=False)
+    manager = serializers.PrimaryKeyRelatedField(queryset=User.objects.all(), allow_null=True, required=False)
+
+    validate_status = staticmethod(OrderSerializer.validate_status)
+
+    def validate(self, attrs):
+        if not attrs:
+            raise serializers.ValidationError('Patch must contain at least one of status, group, manager.')
+        return attrs
+
+
+class OrderBulkUpdateSerializer(serializers.Serializer):
+    ids = serializers.ListField(child=serializers.IntegerField(min_value=1), required=False, allow_empty=False)
+    filter = serializers.DictField(required=False, allow_empty=False)
+    patch = OrderBulkPatchSerializer()
+
+    def validate(self, attrs):
+        if ('ids' in attrs) == ('filter' in attrs):
+            raise serializers.ValidationError('Provide either "ids" or "filter".')
+        return attrs
+
+
+class OrderExportJobSerializer(serializers.ModelSerializer):
+    download_url = serializers.SerializerMethodField()
+
+    class Meta:
+        model = OrderExportJob
+        fields = ['id', 'status', 'rows_done', 'rows_total', 'params', 'error', 'created_at', 'finished_at',
+                  'expires_at', 'download_url']
+        read_only_fields = fields
+
+    def get_download_url(self, obj):
+        if obj.status != 'done':
+            return None
+        url = reverse('orders_export_job_download', kwargs={'pk': obj.pk})
+        request = self.context.get('request')
+        return request.build_absolute_uri(url) if request else url
+
+
+# Serializes values() rows exactly like OrderSerializer without building model instances.
+class OrderRowSerializer:
+    def __init__(self, serializer_class=OrderSerializer, fields=None):
+        self.plan = []
+        for name, field in serializer_class(fields=fields).fields.items():
+            column = '__'.join(field.source_attrs)
+            # DRF skips a dotted source whose relation is missing.
+            skip_none = len(field.source_attrs) > 1
+            self.plan.append((name, column, field.to_representation, skip_none))
+        self.columns = [column for _, column, _, _ in self.plan]
+
+    def to_representation(self, row):
+        data = {}
+        for name, column, to_representation, skip_none in self.plan:
+            value = row[column]
+            if value is None:
+                if not skip_none:
+                    data[name] = None
+            else:
+                data[name] = to_representation(value)
+        return data
+
+    def many(self, rows):
+        to_representation = self.to_representation
+        return [to_representation(row) for row in rows]
+
+
+@functools.lru_cache(maxsize=64)
+def get_order_row_serializer(fields=None):
+    return OrderRowSerializer(fields=fields)
+
+
+def get_sparse_fields(params, serializer_class=OrderSerializer):
+    fields = params.get('fields')
+    exclude = params.get('exclude')
+    if not fields and not exclude:
+        return None
+
+    available = list(serializer_class.Meta.fields)
+    selected = [name.strip() for name in fields.split(',') if name.strip()] if fields else available
+    excluded = [name.strip() for name in exclude.split(',') if name.strip()] if exclude else []
+    unknown = (set(selected) | set(excluded)) - set(available)
+    if unknown:
+        raise serializers.ValidationError({'fields': f'Unknown fields {sorted(unknown)}, available: {available}'})
+
+    result = tuple(name for name in available if name in selected and name not in excluded)
+    if not result:
+        raise serializers.ValidationError({'fields': 'At least one field must be selected.'})
+    return result
+
+
+def get_sparse_columns(fields, serializer_class=OrderSerializer):
+    serializer_fields = serializer_class(fields=fields).fields
+    return ['__'.join(field.source_attrs) for field in serializer_fields.values()]
+
+
 class EmptySerializer(serializers.Serializer):
     pass
@@ -1,14 +1,84 @@
+import codecs
+import csv
+import hashlib
+import io
+import itertools
+import json
+import logging
+import os
+import tempfile
 import uuid
-import pandas as pd
-from openpyxl import Workbook
-from openpyxl.utils.dataframe import dataframe_to_rows
-from openpyxl.styles import Font, PatternFill
-from openpyxl.utils import get_column_letter
-from django.http import HttpResponse
-from rest_framework import status
+import zlib
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+import xlsxwriter
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connection, transaction
+from django.db.models import Count, Q
+from django.http import FileResponse, StreamingHttpResponse
+from django.utils import timezone
+from django_filters.constants import EMPTY_VALUES
+from rest_framework import serializers, status
 from rest_framework.response import Response
 
-from .serializers import OrderSerializer
+from admin_panel.cache import invalidate_order_statistics
+
+from .cache import normalize_query_params, bump_orders_generation
+from .filters import OrderFilter
+from .keyset import iter_keyset
+from .models import (
+    OrderExportJob, OrderModel, OrderStatusCounter, STATUS_CHOICES, COURSE_CHOICES, COURSE_TYPE_CHOICES, COURSE_FORMAT_CHOICES,
+)
+from .serializers import OrderSerializer, OrderExportJobSerializer
+
+logger = logging.getLogger(__name__)
+
+EXPORT_COLUMNS = [
+    ('ID', 'id'),
+    ('Name', 'name'),
+    ('Surname', 'surname'),
+    ('Email', 'email'),
+    ('Phone', 'phone'),
+    ('Age', 'age'),
+    ('Course', 'course'),
+    ('Course Format', 'course_format'),
+    ('Course Type', 'course_type'),
+    ('Status', 'status'),
+    ('Sum', 'sum'),
+    ('Already Paid', 'alreadyPaid'),
+    ('Group', 'group'),
+    ('Created At', 'created_at'),
+    ('Updated At', 'updated_at'),
+    ('Manager', 'manager__first_name'),
+]
+EXPORT_DATETIME_FORMAT = 'yyyy-mm-dd hh:mm:ss'
+EXPORT_DATETIME_WIDTH = len(EXPORT_DATETIME_FORMAT)
+EXPORT_FIELD_NAMES = [field.split('__')[0] for _, field in EXPORT_COLUMNS]
+IMPORT_FIELDS = [
+    'name', 'surname', 'email', 'phone', 'age', 'course', 'course_format', 'course_type',
+    'sum', 'alreadyPaid', 'utm', 'msg', 'status', 'group',
+]
+IMPORT_CHOICES = {
+    'status': STATUS_CHOICES,
+    'course': COURSE_CHOICES,
+    'course_format': COURSE_FORMAT_CHOICES,
+    'course_type': COURSE_TYPE_CHOICES,
+}
+IMPORT_CONTENT_TYPES = {
+    'application/json': 'json',
+    'application/x-ndjson': 'ndjson',
+    'text/csv': 'csv',
+}
+XLSX_CONTENT_TYPE = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+EXPORT_CONTENT_TYPES = {
+    'xlsx': XLSX_CONTENT_TYPE,
+    'csv': 'text/csv; charset=utf-8',
+    'ndjson': 'application/x-ndjson',
+}
 
 
 def update_order_service(instance, validated_data):
@@ -18,70 +88,458 @@ def update_order_service(instance, validated_data):
     return serializer.data
 
 
+def get_bulk_target_queryset(validated_data):
+    if 'ids' in validated_data:
+        return OrderModel.objects.filter(id__in=validated_data['ids'])
+
+    filters = validated_data['filter']
+    # django-filter ignores unknown keys, which would turn a typo into "update everything".
+    unknown = sorted(set(filters) - set(OrderFilter.base_filters))
+    if unknown:
+        raise serializers.ValidationError({'filter': f'Unknown filters {unknown}, available: {list(OrderFilter.base_filters)}'})
+
+    filterset = OrderFilter(filters, queryset=OrderModel.objects.all())
+    if not filterset.is_valid():
+        raise serializers.ValidationError({'filter': filterset.errors})
+    if all(value in EMPTY_VALUES for value in filterset.form.cleaned_data.values()):
+        raise serializers.ValidationError({'filter': 'Filter must constrain at least one field.'})
+    return filterset.qs
+
+
+def bulk_update_orders_service(queryset, patch, user):
+    editable = queryset.filter(Q(manager__isnull=True) | Q(manager=user))
+    with transaction.atomic():
+        if 'status' in patch:
+            # Lock the target rows so the counted old statuses match what the UPDATE overwrites.
+            old_statuses = Counter(editable.select_for_update().order_by().values_list('status', flat=True))
+            deltas = Counter({old: -count for old, count in old_statuses.items()})
+            deltas[patch['status']] += old_statuses.total()
+            OrderStatusCounter.adjust(deltas)
+        updated = editable.order_by().update(**patch, updated_at=timezone.now())
+        transaction.on_commit(bump_orders_generation)
+        transaction.on_commit(invalidate_order_statistics)
+    return updated
+
+
+def handle_bulk_update_orders(validated_data, user):
+    queryset = get_bulk_target_queryset(validated_data)
+    updated = bulk_update_orders_service(queryset, validated_data['patch'], user)
+    return Response({'updated': updated}, status=status.HTTP_200_OK)
+
+
+def iter_import_rows(import_format, lines):
+    if import_format == 'csv':
+        yield from csv.DictReader(lines)
+        return
+
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            yield json.loads(line)
+        except ValueError as e:
+            yield ValidationError(f'Invalid JSON: {e}')
+
+
+def _clean_import_row(row):
+    if isinstance(row, ValidationError):
+        return None, {'row': row.messages}
+    if not isinstance(row, dict):
+        return None, {'row': ['Expected an object']}
+
+    data = {}
+    errors = {}
+    for name in IMPORT_FIELDS:
+        value = row.get(name)
+        if value == '':
+            value = None
+        if name in IMPORT_CHOICES:
+            # Choice columns are validated for the whole batch in _import_batch,
+            # which needs hashable values.
+            if value is not None and not isinstance(value, str):
+                errors[name] = [f"{name.replace('_', ' ').capitalize()} must be a string"]
+            else:
+                data[name] = value
+            continue
+        try:
+            data[name] = OrderModel._meta.get_field(name).clean(value, None)
+        except ValidationError as e:
+            errors[name] = e.messages
+    return data, errors
+
+
+def _import_batch(batch, errors):
+    rows = []
+    for line_number, row in batch:
+        data, row_errors = _clean_import_row(row)
+        rows.append((line_number, data, row_errors))
+
+    for field, choices in IMPORT_CHOICES.items():
+        invalid = {data[field] for _, data, _ in rows if data and data.get(field)} - set(choices)
+        if not invalid:
+            continue
+        for _, data, row_errors in rows:
+            if data and data.get(field) in invalid:
+                row_errors[field] = [f"{field.replace('_', ' ').capitalize()} must be one of {choices}"]
+
+    orders = []
+    for line_number, data, row_errors in rows:
+        if row_errors:
+            errors.append({'row': line_number, 'errors': row_errors})
+        else:
+            orders.append(OrderModel(**data))
+
+    with transaction.atomic():
+        OrderModel.objects.bulk_create(orders, batch_size=settings.ORDER_IMPORT_BATCH_SIZE)
+        OrderStatusCounter.adjust(Counter(order.status for order in orders))
+    return len(orders)
+
+
+def import_orders_service(rows, batch_size=None):
+    batch_size = batch_size or settings.ORDER_IMPORT_BATCH_SIZE
+    created = 0
+    errors = []
+    numbered_rows = enumerate(rows, 1)
+    while True:
+        batch = list(itertools.islice(numbered_rows, batch_size))
+        if not batch:
+            break
+        created += _import_batch(batch, errors)
+
+    if created:
+        transaction.on_commit(bump_orders_generation)
+        transaction.on_commit(invalidate_order_statistics)
+    return {
+        'created': created,
+        'failed': len(errors),
+        'errors': errors[:settings.ORDER_IMPORT_MAX_ERRORS],
+    }
+
+
+def handle_import_orders(request):
+    import_format = IMPORT_CONTENT_TYPES.get(request.content_type.split(';')[0].strip())
+    if import_format is None:
+        return Response(
+            {'detail': f'Content type must be one of {list(IMPORT_CONTENT_TYPES)}'},
+            status=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+        )
+
+    if import_format == 'json':
+        rows = request.data
+        if not isinstance(rows, list):
+            raise serializers.ValidationError('Expected a JSON array of orders.')
+    else:
+        lines = codecs.iterdecode(request.stream or [], 'utf-8')
+        rows = iter_import_rows(import_format, lines)
+
+    result = import_orders_service(rows)
+    return Response(result, status=status.HTTP_201_CREATED if result['created'] else status.HTTP_400_BAD_REQUEST)
+
+
+def rebuild_status_counters_service(dry_run=False):
+    with transaction.atomic():
+        # Holding the counter rows blocks concurrent order writes until the recount is stored.
+        stored = dict(OrderStatusCounter.objects.select_for_update().values_list('status_code', 'count'))
+        actual = {code: 0 for code in stored}
+        actual[OrderStatusCounter.NULL_STATUS_CODE] = 0
+        actual.update({OrderStatusCounter.code_for(label): 0 for label in STATUS_CHOICES})
+        rows = OrderModel.objects.order_by().values_list('status').annotate(count=Count('id'))
+        for label, count in rows:
+            actual[OrderStatusCounter.code_for(label)] = count
+
+        drift = [
+            {'status': OrderStatusCounter.label_for(code), 'stored': stored.get(code), 'actual': count}
+            for code, count in sorted(actual.items())
+            if stored.get(code) != count
+        ]
+        if not dry_run:
+            for row in drift:
+                code = OrderStatusCounter.code_for(row['status'])
+                OrderStatusCounter.objects.update_or_create(pk=code, defaults={'count': row['actual']})
+    return drift
+
+
+def _get_table_row_estimate(table):
+    if connection.vendor == 'mysql':
+        sql = 'SELECT TABLE_ROWS FROM information_schema.TABLES WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s'
+    elif connection.vendor == 'postgresql':
+        sql = 'SELECT reltuples::bigint FROM pg_class WHERE relname = %s'
+    else:
+        return None
+
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [table])
+        row = cursor.fetchone()
+    if row is None or row[0] is None or row[0] < 0:
+        return None
+    return int(row[0])
+
+
+def estimate_queryset_count(queryset):
+    queryset = queryset.order_by()
+    if not queryset.query.where:
+        estimate = _get_table_row_estimate(queryset.model._meta.db_table)
+        if estimate is not None:
+            return estimate
+
+    key = f'orders:count:{hashlib.sha256(str(queryset.query).encode()).hexdigest()}'
+    return cache.get_or_set(key, queryset.count, settings.ORDER_COUNT_CACHE_TTL)
+
+
+def iter_export_rows(queryset):
+    fields = [field for _, field in EXPORT_COLUMNS]
+    return iter_keyset(queryset, fields, settings.ORDER_EXPORT_CHUNK_SIZE)
+
+
+def _estimate_column_widths(sample):
+    widths = [len(header) for header, _ in EXPORT_COLUMNS]
+    for row in sample:
+        for idx, value in enumerate(row):
+            if value is None:
+                continue
+            if hasattr(value, 'tzinfo'):
+                length = EXPORT_DATETIME_WIDTH
+            else:
+                length = len(str(value))
+            widths[idx] = max(widths[idx], length)
+    return [width + 2 for width in widths]
+
+
+def write_orders_xlsx(queryset, file, progress=None):
+    sample_size = settings.ORDER_EXPORT_WIDTH_SAMPLE_SIZE
+    rows = iter_export_rows(queryset)
+    sample = list(itertools.islice(rows, sample_size))
+
+    wb = xlsxwriter.Workbook(file, {
+        'constant_memory': True,
+        'remove_timezone': True,
+        'strings_to_formulas': False,
+        'strings_to_urls': False,
+        'default_date_format': EXPORT_DATETIME_FORMAT,
+    })
+    ws = wb.add_worksheet()
+    header_format = wb.add_format({'bold': True, 'bg_color': '#00FF00', 'pattern': 1})
+
+    for idx, width in enumerate(_estimate_column_widths(sample)):
+        ws.set_column(idx, idx, width)
+
+    ws.write_row(0, 0, [header for header, _ in EXPORT_COLUMNS], header_format)
+    row_count = 0
+    for row_count, row in enumerate(itertools.chain(sample, rows), 1):
+        ws.write_row(row_count, 0, row)
+        if progress is not None and row_count % settings.ORDER_EXPORT_CHUNK_SIZE == 0:
+            progress(row_count)
+
+    wb.close()
+    return row_count
+
+
 def export_orders_to_excel_service(queryset):
-    data = []
-    for order in queryset:
-        created_at = order.created_at
-        updated_at = order.updated_at
-
-        if created_at is not None and created_at.tzinfo is not None:
-            created_at = created_at.replace(tzinfo=None)
-
-        if updated_at is not None and updated_at.tzinfo is not None:
-            updated_at = updated_at.replace(tzinfo=None)
-
-        data.append({
-            'ID': order.id,
-            'Name': order.name,
-            'Surname': order.surname,
-            'Email': order.email,
-            'Phone': order.phone,
-            'Age': order.age,
-            'Course': order.course,
-            'Course Format': order.course_format,
-            'Course Type': order.course_type,
-            'Status': order.status,
-            'Sum': order.sum,
-            'Already Paid': order.alreadyPaid,
-            'Group': order.group,
-            'Created At': created_at,
-            'Updated At': updated_at,
-            'Manager': order.manager.first_name if order.manager else '',
-        })
-
-    df = pd.DataFrame(data)
-
-    wb = Workbook()
-    ws = wb.active
-
-    for r_idx, row in enumerate(dataframe_to_rows(df, index=False, header=True), 1):
-        for c_idx, value in enumerate(row, 1):
-            cell = ws.cell(row=r_idx, column=c_idx, value=value)
-
-            if r_idx == 1:
-                cell.font = Font(bold=True)
-                cell.fill = PatternFill(start_color="00FF00", end_color="00FF00", fill_type="solid")
-
-    for column in ws.columns:
-        max_length = 0
-        column_letter = get_column_letter(column[0].column)
-        for cell in column:
-            try:
-                if cell.value:
-                    max_length = max(max_length, len(str(cell.value)))
-            except TypeError:
-                pass
-
-        adjusted_width = max_length + 2
-        ws.column_dimensions[column_letter].width = adjusted_width
-
-    file_name = f'{uuid.uuid4()}.xlsx'
-    response = HttpResponse(content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet')
-    response['Content-Disposition'] = f'attachment; filename={file_name}'
-    wb.save(response)
+    file = tempfile.TemporaryFile()
+    try:
+        write_orders_xlsx(queryset, file)
+        file.seek(0)
+    except Exception:
+        file.close()
+        raise
+
+    return FileResponse(
+        file,
+        as_attachment=True,
+        filename=f'{uuid.uuid4()}.xlsx',
+        content_type=XLSX_CONTENT_TYPE,
+    )
+
+
+def _to_plain(value, encoder=DjangoJSONEncoder()):
+    if hasattr(value, 'isoformat'):
+        return encoder.default(value)
+    return value
+
+
+def iter_orders_csv(rows):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_FIELD_NAMES)
+    for idx, row in enumerate(rows, 1):
+        writer.writerow([_to_plain(value) for value in row])
+        if idx % settings.ORDER_EXPORT_CHUNK_SIZE == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
+
+def iter_orders_ndjson(rows):
+    lines = []
+    for row in rows:
+        lines.append(json.dumps(dict(zip(EXPORT_FIELD_NAMES, row)), cls=DjangoJSONEncoder))
+        if len(lines) == settings.ORDER_EXPORT_CHUNK_SIZE:
+            yield '\n'.join(lines) + '\n'
+            lines = []
+    if lines:
+        yield '\n'.join(lines) + '\n'
+
+
+EXPORT_STREAMS = {
+    'csv': iter_orders_csv,
+    'ndjson': iter_orders_ndjson,
+}
 
+
+def _gzip_chunks(chunks):
+    compressor = zlib.compressobj(wbits=zlib.MAX_WBITS | 16)
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def export_orders_stream_service(queryset, export_format, compress=False):
+    chunks = (chunk.encode() for chunk in EXPORT_STREAMS[export_format](iter_export_rows(queryset)))
+    if compress:
+        chunks = _gzip_chunks(chunks)
+
+    response = StreamingHttpResponse(chunks, content_type=EXPORT_CONTENT_TYPES[export_format])
+    response['Content-Disposition'] = f'attachment; filename="{uuid.uuid4()}.{export_format}"'
+    if compress:
+        response['Content-Encoding'] = 'gzip'
     return response
 
+
+def write_orders_stream(queryset, export_format, file, progress=None):
+    row_count = 0
+
+    def counted_rows():
+        nonlocal row_count
+        for row_count, row in enumerate(iter_export_rows(queryset), 1):
+            yield row
+            if progress is not None and row_count % settings.ORDER_EXPORT_CHUNK_SIZE == 0:
+                progress(row_count)
+
+    for chunk in EXPORT_STREAMS[export_format](counted_rows()):
+        file.write(chunk.encode())
+    return row_count
+
+
+def get_export_format(params):
+    export_format = params.get('format', 'xlsx')
+    if export_format not in EXPORT_CONTENT_TYPES:
+        raise serializers.ValidationError({'format': f'Format must be one of {list(EXPORT_CONTENT_TYPES)}'})
+    return export_format
+
+
+def handle_export_orders(queryset, params):
+    export_format = get_export_format(params)
+    if export_format == 'xlsx':
+        return export_orders_to_excel_service(queryset)
+    return export_orders_stream_service(queryset, export_format, params.get('gzip') in ('1', 'true'))
+
+
+_export_executor = None
+
+
+def _get_export_executor():
+    global _export_executor
+    if _export_executor is None:
+        _export_executor = ThreadPoolExecutor(
+            max_workers=settings.ORDER_EXPORT_WORKERS,
+            thread_name_prefix='order-export',
+        )
+    return _export_executor
+
+
+def run_export_job(job_id, queryset, export_format):
+    jobs = OrderExportJob.objects.filter(pk=job_id)
+    path = os.path.join(settings.ORDER_EXPORT_ROOT, f'{job_id}.{export_format}')
+    part_path = f'{path}.part'
+
+    def progress(rows_done):
+        jobs.update(rows_done=rows_done)
+
+    try:
+        jobs.update(status='running', rows_total=queryset.count())
+        os.makedirs(settings.ORDER_EXPORT_ROOT, exist_ok=True)
+        with open(part_path, 'wb') as file:
+            if export_format == 'xlsx':
+                rows_done = write_orders_xlsx(queryset, file, progress=progress)
+            else:
+                rows_done = write_orders_stream(queryset, export_format, file, progress=progress)
+        os.replace(part_path, path)
+
+        finished_at = timezone.now()
+        jobs.update(
+            status='done',
+            rows_done=rows_done,
+            file_path=path,
+            finished_at=finished_at,
+            expires_at=finished_at + settings.ORDER_EXPORT_TTL,
+        )
+    except Exception as e:
+        logger.exception(f"Order export job {job_id} failed")
+        if os.path.exists(part_path):
+            os.remove(part_path)
+        jobs.update(status='failed', error=str(e), finished_at=timezone.now())
+    finally:
+        connection.close()
+
+
+def cleanup_expired_export_jobs_service():
+    now = timezone.now()
+    expired = OrderExportJob.objects.filter(
+        Q(expires_at__lt=now) | Q(expires_at__isnull=True, created_at__lt=now - settings.ORDER_EXPORT_TTL)
+    )
+    removed = 0
+    for job in expired.only('id', 'file_path'):
+        if job.file_path and os.path.exists(job.file_path):
+            os.remove(job.file_path)
+        job.delete()
+        removed += 1
+    return removed
+
+
+def create_export_job_service(queryset, params, user):
+    export_format = get_export_format(params)
+    cleanup_expired_export_jobs_service()
+    params_hash, normalized_params = normalize_query_params(params)
+    now = timezone.now()
+
+    job = OrderExportJob.objects.filter(
+        params_hash=params_hash,
+        status__in=['pending', 'running', 'done'],
+        created_at__gte=now - settings.ORDER_EXPORT_REUSE_WINDOW,
+    ).exclude(expires_at__lt=now).order_by('-created_at').first()
+    if job is not None:
+        return job, False
+
+    job = OrderExportJob.objects.create(params=normalized_params, params_hash=params_hash, created_by=user)
+    transaction.on_commit(lambda: _get_export_executor().submit(run_export_job, job.pk, queryset, export_format))
+    return job, True
+
+
+def handle_create_export_job(queryset, params, user, request):
+    job, created = create_export_job_service(queryset, params, user)
+    serializer = OrderExportJobSerializer(job, context={'request': request})
+    return Response(serializer.data, status=status.HTTP_202_ACCEPTED if created else status.HTTP_200_OK)
+
+
+def handle_download_export_job(job):
+    if job.status != 'done':
+        return Response({'detail': f'Export is {job.status}', 'status': job.status}, status=status.HTTP_409_CONFLICT)
+    if job.expires_at < timezone.now() or not os.path.exists(job.file_path):
+        return Response({'detail': 'Export has expired'}, status=status.HTTP_410_GONE)
+
+    export_format = os.path.splitext(job.file_path)[1].lstrip('.')
+    return FileResponse(
+        open(job.file_path, 'rb'),
+        as_attachment=True,
+        filename=os.path.basename(job.file_path),
+        content_type=EXPORT_CONTENT_TYPES[export_format],
+    )
+
+
 def handle_partial_update_order(instance, data):
     updated_data = update_order_service(instance, data)
     return Response(updated_data, status=status.HTTP_200_OK)
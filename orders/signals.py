@@ -0,0 +1,39 @@
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from admin_panel.cache import invalidate_order_statistics
+from admin_panel.models import OrderRollupDirtyDay
+
+from .cache import bump_orders_generation
+from .models import OrderModel, OrderStatusCounter
+
+
+@receiver(post_save, sender=OrderModel)
+@receiver(post_delete, sender=OrderModel)
+def invalidate_orders_on_order_change(sender, instance, **kwargs):
+    transaction.on_commit(bump_orders_generation)
+    transaction.on_commit(invalidate_order_statistics)
+
+
+# Deleted orders leave nothing for the incremental rollup refresh to find by updated_at.
+@receiver(post_delete, sender=OrderModel)
+def mark_rollup_day_on_order_delete(sender, instance, **kwargs):
+    if instance.created_at is not None:
+        OrderRollupDirtyDay.objects.update_or_create(
+            day=timezone.localdate(instance.created_at), defaults={'marked_at': timezone.now()},
+        )
+
+
+# Runs inside the delete transaction; creation and status changes are counted in OrderModel.save().
+@receiver(post_delete, sender=OrderModel)
+def decrement_status_counter_on_order_delete(sender, instance, **kwargs):
+    OrderStatusCounter.adjust({instance.status: -1})
+
+
+@receiver(post_save, sender=User)
+def invalidate_orders_on_manager_change(sender, instance, **kwargs):
+    transaction.on_commit(bump_orders_generation)
+    transaction.on_commit(invalidate_order_statistics)
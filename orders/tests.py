@@ -0,0 +1,79 @@
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+
+from comments.services import create_comment_service
+from users.models import UserProfile
+from .models import OrderModel
+from .serializers import OrderSerializer
+
+
+class OrderListTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create(username='admin', email='admin@example.com', first_name='Ann')
+        UserProfile.objects.filter(user=cls.admin).update(role='admin')
+        cls.managers = [
+            User.objects.create(username=f'manager{i}', email=f'manager{i}@example.com', first_name=f'Manager{i}')
+            for i in range(3)
+        ]
+
+        statuses = ['In work', 'New', 'Agree', 'Disagree', 'Dubbing', None]
+        for i in range(40):
+            OrderModel.objects.create(
+                name=f'Name{i}', surname=f'Surname{i}', email=f'user{i}@example.com', phone=f'38050{i:07d}',
+                age=20 + i % 30, course=['FS', 'QACX', 'JCX'][i % 3], course_format=['static', 'online'][i % 2],
+                course_type='pro', sum=[None, 1000, 2500][i % 3], alreadyPaid=[None, 0, 500][i % 3],
+                status=statuses[i % len(statuses)], group=['g1', None][i % 2],
+                manager=None if i % 4 == 0 else cls.managers[i % 3],
+            )
+
+        # Comments set the denormalized last commenter on a mix of orders.
+        for order in OrderModel.objects.order_by('id')[:30]:
+            user = order.manager or cls.managers[order.pk % 3]
+            create_comment_service(order, user, {'text': f'Comment on {order.pk}'})
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.admin)
+
+    def render_expected(self, queryset, fields=None):
+        return JSONRenderer().render(OrderSerializer(queryset, many=True, fields=fields).data)
+
+    def test_list_query_count_does_not_grow_with_related_rows(self):
+        self.assertTrue(OrderModel.objects.filter(manager__isnull=False, last_comment_by__isnull=False).exists())
+
+        # Page count and one joined page query; nothing per manager or commenter.
+        with self.assertNumQueries(2):
+            response = self.client.get('/orders/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['results']), 25)
+
+        with self.assertNumQueries(0):
+            cached = self.client.get('/orders/')
+        self.assertEqual(cached['X-Cache'], 'HIT')
+
+        with self.assertNumQueries(0):
+            response = self.client.get('/orders/', HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 304)
+
+    def test_list_renders_like_order_serializer(self):
+        queryset = OrderModel.objects.select_related('manager', 'last_comment_by').order_by('-id')
+
+        response = self.client.get('/orders/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(JSONRenderer().render(response.data['results']), self.render_expected(queryset[:25]))
+
+        response = self.client.get('/orders/', {'page': 2})
+        self.assertEqual(JSONRenderer().render(response.data['results']), self.render_expected(queryset[25:50]))
+
+    def test_sparse_list_renders_like_order_serializer(self):
+        fields = ('id', 'status', 'manager', 'last_comment_by', 'created_at')
+        queryset = OrderModel.objects.select_related('manager', 'last_comment_by').order_by('-id')
+
+        response = self.client.get('/orders/', {'fields': ','.join(fields)})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(JSONRenderer().render(response.data['results']), self.render_expected(queryset[:25], fields))
@@ -1,8 +1,9 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 
-from comments.views import CommentCreateView, CommentListView
-from orders.views import OrderExcelExportView, OrderModelViewSet
+from comments.views import CommentCreateView, CommentListView, CommentBatchListView
+from orders.views import OrderExcelExportView, OrderModelViewSet, OrderExportJobCreateView, \
+    OrderExportJobDetailView, OrderExportJobDownloadView
 
 router=DefaultRouter()
 
@@ -10,7 +11,12 @@ router.register(r'', OrderModelViewSet, basename='order')
 
 urlpatterns = [
     path('comments/', CommentCreateView.as_view(), name='comment_create'),
+    path('comments/batch/', CommentBatchListView.as_view(), name='order_comments_batch'),
     path('comments/<int:order_id>/', CommentListView.as_view(), name='order_comments'),
     path('excel/export/', OrderExcelExportView.as_view(), name='orders_excel_export'),
+    path('excel/export/jobs/', OrderExportJobCreateView.as_view(), name='orders_export_job_create'),
+    path('excel/export/jobs/<uuid:pk>/', OrderExportJobDetailView.as_view(), name='orders_export_job_detail'),
+    path('excel/export/jobs/<uuid:pk>/download/', OrderExportJobDownloadView.as_view(),
+         name='orders_export_job_download'),
     path('', include(router.urls)),
     ]
\ No newline at end of file
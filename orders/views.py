@@ -1,42 +1,114 @@
 from rest_framework import permissions
-from rest_framework.generics import GenericAPIView
+from rest_framework.decorators import action
+from rest_framework.generics import GenericAPIView, RetrieveAPIView
 from rest_framework.viewsets import GenericViewSet
 from rest_framework.mixins import RetrieveModelMixin, ListModelMixin
-from rest_framework.pagination import PageNumberPagination
-from rest_framework.filters import OrderingFilter
+from rest_framework.response import Response
 from django_filters.rest_framework import DjangoFilterBackend
 
-from .filters import OrderFilter
-from .models import OrderModel
-from .serializers import OrderSerializer, EmptySerializer
+from .cache import cached_response, conditional_response, get_queryset_validators, get_object_validators
+from .filters import OrderFilter, OrderOrderingFilter, OrderSearchFilter
+from .models import OrderModel, OrderExportJob
+from .negotiation import ExportContentNegotiation
+from .pagination import OrderPagination, OrderCursorPagination
+from .serializers import OrderSerializer, EmptySerializer, OrderExportJobSerializer, OrderBulkUpdateSerializer, \
+    get_order_row_serializer, get_sparse_fields, get_sparse_columns
 from .permissions import IsOrderManagerOrReadOnly
 from .services import (
-    handle_partial_update_order, export_orders_to_excel_service,
+    handle_partial_update_order, handle_export_orders, handle_create_export_job, handle_download_export_job,
+    handle_bulk_update_orders, handle_import_orders,
 )
 
 
-class OrderPagination(PageNumberPagination):
-    page_size = 25
-
-
 class OrderModelViewSet(RetrieveModelMixin, ListModelMixin, GenericViewSet):
-    queryset = OrderModel.objects.all().order_by('-id')
+    queryset = OrderModel.objects.select_related('manager', 'last_comment_by').order_by('-id')
     serializer_class = OrderSerializer
     permission_classes = [permissions.IsAuthenticated, IsOrderManagerOrReadOnly]
     pagination_class = OrderPagination
-    filter_backends = [DjangoFilterBackend, OrderingFilter]
+    filter_backends = [DjangoFilterBackend, OrderOrderingFilter, OrderSearchFilter]
     filterset_class = OrderFilter
     ordering_fields = '__all__'
     ordering = ['-id']
 
+    @property
+    def paginator(self):
+        if not hasattr(self, '_paginator'):
+            params = self.request.query_params
+            if OrderCursorPagination.cursor_query_param in params or params.get('pagination') == 'cursor':
+                self._paginator = OrderCursorPagination()
+            else:
+                self._paginator = self.pagination_class()
+        return self._paginator
+
+    def get_sparse_fields(self):
+        return get_sparse_fields(self.request.query_params)
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        fields = self.get_sparse_fields() if self.action == 'retrieve' else None
+        if fields is None:
+            return queryset
+        related = [name for name in ['manager', 'last_comment_by'] if name in fields]
+        queryset = queryset.select_related(None).select_related(*related)
+        return queryset.only(*get_sparse_columns(fields))
+
+    def get_serializer(self, *args, **kwargs):
+        if self.action == 'retrieve':
+            kwargs.setdefault('fields', self.get_sparse_fields())
+        return super().get_serializer(*args, **kwargs)
+
+    def list(self, request, *args, **kwargs):
+        etag, last_modified = get_queryset_validators(request)
+        return conditional_response(
+            request, etag, last_modified,
+            lambda: cached_response(request, 'list', self.build_list_response),
+        )
+
+    def build_list_response(self):
+        row_serializer = get_order_row_serializer(self.get_sparse_fields())
+        columns = ['id', *row_serializer.columns]
+        if isinstance(self.paginator, OrderCursorPagination):
+            columns.append(self.paginator.get_ordering(self.request)[0])
+
+        queryset = self.filter_queryset(self.get_queryset())
+        rows = queryset.values(*dict.fromkeys(columns))
+
+        page = self.paginate_queryset(rows)
+        if page is not None:
+            return self.get_paginated_response(row_serializer.many(page))
+        return Response(row_serializer.many(rows))
+
+    def retrieve(self, request, *args, **kwargs):
+        pk = kwargs[self.lookup_field]
+        etag, last_modified = get_object_validators(request, OrderModel.objects.all(), pk)
+        return conditional_response(
+            request, etag, last_modified,
+            lambda: cached_response(
+                request,
+                f'detail:{pk}',
+                lambda: super(OrderModelViewSet, self).retrieve(request, *args, **kwargs),
+            ),
+        )
+
     def partial_update(self, request, *args, **kwargs):
         instance = self.get_object()
         return handle_partial_update_order(instance, request.data)
 
+    @action(detail=False, methods=['patch'], url_path='bulk', serializer_class=OrderBulkUpdateSerializer)
+    def bulk(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        return handle_bulk_update_orders(serializer.validated_data, request.user)
+
+    @bulk.mapping.post
+    def bulk_create(self, request, *args, **kwargs):
+        return handle_import_orders(request)
+
 
 class OrderExcelExportView(GenericAPIView):
     permission_classes = [permissions.IsAuthenticated]
-    filter_backends = [DjangoFilterBackend, OrderingFilter]
+    content_negotiation_class = ExportContentNegotiation
+    filter_backends = [DjangoFilterBackend, OrderOrderingFilter]
     filterset_class = OrderFilter
     ordering_fields = '__all__'
     ordering = ['-id']
@@ -48,5 +120,41 @@ class OrderExcelExportView(GenericAPIView):
 
     def get(self, request, *args, **kwargs):
         orders = self.filter_queryset(OrderModel.objects.all())
-        response = export_orders_to_excel_service(orders)
-        return response
+        return handle_export_orders(orders, request.query_params)
+
+
+class OrderExportJobCreateView(GenericAPIView):
+    permission_classes = [permissions.IsAuthenticated]
+    content_negotiation_class = ExportContentNegotiation
+    filter_backends = [DjangoFilterBackend, OrderOrderingFilter]
+    filterset_class = OrderFilter
+    ordering_fields = '__all__'
+    ordering = ['-id']
+
+    def get_serializer_class(self):
+        if getattr(self, 'swagger_fake_view', False):
+            return EmptySerializer
+        return OrderExportJobSerializer
+
+    def post(self, request, *args, **kwargs):
+        orders = self.filter_queryset(OrderModel.objects.all())
+        return handle_create_export_job(orders, request.query_params, request.user, request)
+
+
+class OrderExportJobDetailView(RetrieveAPIView):
+    queryset = OrderExportJob.objects.all()
+    serializer_class = OrderExportJobSerializer
+    permission_classes = [permissions.IsAuthenticated]
+
+
+class OrderExportJobDownloadView(GenericAPIView):
+    queryset = OrderExportJob.objects.all()
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get_serializer_class(self):
+        if getattr(self, 'swagger_fake_view', False):
+            return EmptySerializer
+        return None
+
+    def get(self, request, *args, **kwargs):
+        return handle_download_export_job(self.get_object())